@@ -1,12 +1,23 @@
 import streamlit as st
+import numpy as np
+import pandas as pd
 import sys
 import os
 
 # Add current directory to path so we can import our modules
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from data.solar_data import get_solar_data
+from data.presets import ANALYSIS_END_DATE, ANALYSIS_START_DATE, DEFAULT_ELECTRICITY_RATE, DEFAULT_SYSTEM_SIZE_KW, PRESET_LOCATIONS
+from data.tmy import TMY_END_YEAR, TMY_START_YEAR, WEATHER_ACTUAL, WEATHER_P50, WEATHER_P90, WEATHER_TMY
 from models.roi_calculator import SolarROICalculator
+from models.payback import format_payback
+from models.equipment import evaluate_equipment
+from models.tariff import LOAD_SHAPES, TARIFFS
+from models.site_analysis import compare_tariffs
+from models.comparison import RESULT_COLUMNS, compare_locations, fetch_average_irradiance, parse_locations
+from utils.export import EXPORT_FORMATS, cash_flow_frame, export_bundle, export_dataframe, file_name, mime_type
+from utils.reports import ReportService, report_input, report_key
+from utils.cache_warmer import CacheWarmer
 
 st.set_page_config(
     page_title="Solar ROI Predictor - NASA Techies",
@@ -55,6 +66,118 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_cache_warmer():
+    # Precomputes presets and popular sites at startup and on a schedule
+    return CacheWarmer().start()
+
+
+@st.cache_resource
+def get_report_service():
+    # One worker pool per server process, shared by every session
+    return ReportService()
+
+
+@st.fragment(run_every=1)
+def report_status(job_id):
+    # Polls the background job without rerunning the whole page
+    status = get_report_service().status(job_id)
+    if status in ('done', 'failed', 'unknown'):
+        st.rerun(scope="app")
+    st.info("⏳ Report is rendering..." if status == 'running' else "🕒 Report is queued...")
+
+
+FLAT_RATE_OPTION = "Flat rate (set below)"
+
+WEATHER_OPTIONS = {
+    WEATHER_ACTUAL: f"{ANALYSIS_START_DATE[:4]} (single year)",
+    WEATHER_TMY: f"Typical Meteorological Year ({TMY_START_YEAR}-{TMY_END_YEAR})",
+    WEATHER_P50: "P50 year (median)",
+    WEATHER_P90: "P90 year (conservative)",
+}
+
+# Default sites for the comparison table
+DEFAULT_COMPARISON_LOCATIONS = pd.DataFrame({
+    'Location': [preset['name'] for preset in PRESET_LOCATIONS],
+    'Latitude': [preset['latitude'] for preset in PRESET_LOCATIONS],
+    'Longitude': [preset['longitude'] for preset in PRESET_LOCATIONS]
+})
+
+COMPARISON_PAGE_SIZE = 50
+COMPARISON_CHART_SITES = 25  # bars drawn per comparison chart
+MAP_CLUSTER_THRESHOLD = 50  # above this, comparison markers are clustered and built client-side
+
+# Builds one marker per [lat, lon, popup, color] row in the browser
+FAST_MARKER_CALLBACK = """
+function (row) {
+    var icon = L.AwesomeMarkers.icon({icon: 'sun', prefix: 'fa', markerColor: row[3]});
+    return L.marker(new L.LatLng(row[0], row[1]), {icon: icon}).bindPopup(row[2]);
+};
+"""
+
+# Display formats for the numeric comparison columns
+COMPARISON_COLUMN_CONFIG = {
+    'Latitude': st.column_config.NumberColumn(format="%.2f"),
+    'Longitude': st.column_config.NumberColumn(format="%.2f"),
+    'Avg Irradiance (kWh/m²/day)': st.column_config.NumberColumn(format="%.2f"),
+    'ROI (%)': st.column_config.NumberColumn(format="%.1f%%"),
+    'Payback (years)': st.column_config.NumberColumn(format="%.1f"),
+    'Annual Production (kWh)': st.column_config.NumberColumn(format="localized"),
+    'Net Profit ($)': st.column_config.NumberColumn(format="dollar"),
+}
+NEVER_PAYBACK_CAPTION = "A missing payback means the system doesn't break even within 25 years."
+
+
+def payback_table(df):
+    # 'Never' paybacks (inf) shown as missing values, so the column stays numeric and sortable
+    never = np.isinf(df['Payback (years)'])
+    return df.assign(**{'Payback (years)': df['Payback (years)'].mask(never)}), bool(never.any())
+
+
+def comparison_form(key_suffix=""):
+    # Location table (typed, pasted or uploaded) plus shared parameters
+    st.write("Add, paste or upload the locations you want to compare (name, latitude, longitude):")
+
+    uploaded = st.file_uploader("Upload locations (CSV)", type="csv", key=f"comp_upload{key_suffix}")
+    edited = st.data_editor(
+        DEFAULT_COMPARISON_LOCATIONS,
+        num_rows="dynamic",
+        use_container_width=True,
+        key=f"comp_editor{key_suffix}",
+        column_config={
+            'Latitude': st.column_config.NumberColumn(min_value=-90.0, max_value=90.0, format="%.4f"),
+            'Longitude': st.column_config.NumberColumn(min_value=-180.0, max_value=180.0, format="%.4f"),
+        }
+    )
+
+    comp_weather = st.selectbox(
+        "Weather Basis for Comparison",
+        list(WEATHER_OPTIONS),
+        format_func=WEATHER_OPTIONS.get,
+        key=f"comp_weather_basis{key_suffix}"
+    )
+    comp_system_size = st.slider("System Size for Comparison (kW)", 10, 1000, 100, key=f"comp_size{key_suffix}")
+    comp_elec_rate = st.slider("Electricity Rate for Comparison ($/kWh)", 0.05, 0.30, 0.12, 0.01, key=f"comp_rate{key_suffix}")
+
+    if st.button("🔍 Compare Locations", type="primary", key=f"compare{key_suffix}"):
+        try:
+            locations = parse_locations(uploaded if uploaded is not None else edited)
+        except Exception as e:
+            st.error(f"❌ Could not read locations: {e}")
+            return
+
+        if locations.empty:
+            st.error("❌ Please enter at least one location with valid coordinates.")
+            return
+
+        st.session_state.comparison_done = True
+        st.session_state.comparison_locations = locations
+        st.session_state.comp_system_size = comp_system_size
+        st.session_state.comp_elec_rate = comp_elec_rate
+        st.session_state.comp_weather = comp_weather
+        st.session_state.comparison_data = None  # Reset comparison data
+
+
 # Initialize session state
 if 'analyzed' not in st.session_state:
     st.session_state.analyzed = False
@@ -68,6 +191,19 @@ if 'comparison_done' not in st.session_state:
     st.session_state.comparison_done = False
 if 'comparison_data' not in st.session_state:
     st.session_state.comparison_data = None
+if 'analysis' not in st.session_state:
+    st.session_state.analysis = None
+if 'tariff_name' not in st.session_state:
+    st.session_state.tariff_name = FLAT_RATE_OPTION
+if 'weather' not in st.session_state:
+    st.session_state.weather = WEATHER_ACTUAL
+if 'site_load' not in st.session_state:
+    st.session_state.site_load = None
+if 'usage_sites' not in st.session_state:
+    st.session_state.usage_sites = set()  # sites this session already counted in the usage log
+
+# Start warming presets and popular sites on the first page load
+get_cache_warmer()
 
 # Sidebar
 with st.sidebar:
@@ -81,8 +217,19 @@ with st.sidebar:
     latitude = col1.number_input("Latitude", -90.0, 90.0, default_lat)
     longitude = col2.number_input("Longitude", -180.0, 180.0, default_lon)
 
-    system_size = st.slider("System Size (kW)", 10, 1000, 100)
-    electricity_rate = st.slider("Electricity Rate ($/kWh)", 0.05, 0.30, 0.12, 0.01)
+    weather = st.selectbox("Weather Basis", list(WEATHER_OPTIONS), format_func=WEATHER_OPTIONS.get)
+    system_size = st.slider("System Size (kW)", 10, 1000, DEFAULT_SYSTEM_SIZE_KW)
+    tariff_name = st.selectbox("Electricity Tariff", [FLAT_RATE_OPTION] + [tariff['name'] for tariff in TARIFFS])
+    electricity_rate = st.slider(
+        "Electricity Rate ($/kWh)", 0.05, 0.30, DEFAULT_ELECTRICITY_RATE, 0.01,
+        disabled=tariff_name != FLAT_RATE_OPTION
+    )
+    load_help = "Used to value self-consumption, export credits and demand charges under tariffs"
+    load_shape = st.selectbox("Site Load Profile", list(LOAD_SHAPES), help=load_help)
+    annual_load_kwh = st.number_input(
+        "Annual Site Consumption (kWh)", 1_000, 10_000_000, 150_000, 10_000, help=load_help
+    )
+    site_load = (load_shape, float(annual_load_kwh))
 
     if st.button("🔍 Analyze Investment", type="primary"):
         st.session_state.analyzed = True
@@ -90,27 +237,19 @@ with st.sidebar:
         st.session_state.longitude = longitude
         st.session_state.system_size = system_size
         st.session_state.electricity_rate = electricity_rate
+        st.session_state.tariff_name = tariff_name
+        st.session_state.weather = weather
+        st.session_state.site_load = site_load
 
     st.divider()
     st.subheader("🌍 Try These Locations")
 
-    if st.button("☀️ Phoenix, AZ", use_container_width=True):
-        st.session_state.try_lat = 33.45
-        st.session_state.try_lon = -112.07
-        st.rerun()
-    st.caption("Lat: 33.45, Lon: -112.07")
-
-    if st.button("🎰 Las Vegas, NV", use_container_width=True):
-        st.session_state.try_lat = 36.17
-        st.session_state.try_lon = -115.14
-        st.rerun()
-    st.caption("Lat: 36.17, Lon: -115.14")
-
-    if st.button("🏖️ Miami, FL", use_container_width=True):
-        st.session_state.try_lat = 25.76
-        st.session_state.try_lon = -80.19
-        st.rerun()
-    st.caption("Lat: 25.76, Lon: -80.19")
+    for preset in PRESET_LOCATIONS:
+        if st.button(f"{preset['icon']} {preset['name']}", use_container_width=True):
+            st.session_state.try_lat = preset['latitude']
+            st.session_state.try_lon = preset['longitude']
+            st.rerun()
+        st.caption(f"Lat: {preset['latitude']}, Lon: {preset['longitude']}")
 
 # Main area
 st.subheader("Analyze Solar Investment Returns using NASA Satellite Data")
@@ -121,28 +260,41 @@ if st.session_state.analyzed:
         st.session_state.latitude != latitude or
         st.session_state.longitude != longitude or
         st.session_state.system_size != system_size or
-        st.session_state.electricity_rate != electricity_rate):
+        st.session_state.electricity_rate != electricity_rate or
+        st.session_state.tariff_name != tariff_name or
+        st.session_state.weather != weather or
+        st.session_state.site_load != site_load):
 
         # Update session state with current values
         st.session_state.latitude = latitude
         st.session_state.longitude = longitude
         st.session_state.system_size = system_size
         st.session_state.electricity_rate = electricity_rate
+        st.session_state.tariff_name = tariff_name
+        st.session_state.weather = weather
+        st.session_state.site_load = site_load
 
+        # Presets and popular sites are usually already in the warm store
+        usage_site = (round(latitude, 2), round(longitude, 2))
         with st.spinner("🛰️ Fetching NASA satellite data..."):
-            solar_df = get_solar_data(latitude, longitude, '2024-01-01', '2024-12-31')
-
-        if solar_df is not None:
-            avg_irradiance = solar_df['solar_irradiance'].mean()
-
-            # Calculate ROI
-            calculator = SolarROICalculator()
-            results = calculator.calculate_roi(avg_irradiance, system_size, electricity_rate)
+            analysis = get_cache_warmer().analysis(
+                latitude,
+                longitude,
+                system_size,
+                electricity_rate,
+                None if tariff_name == FLAT_RATE_OPTION else tariff_name,
+                weather,
+                *site_load,
+                count_usage=usage_site not in st.session_state.usage_sites
+            )
+        st.session_state.usage_sites.add(usage_site)
 
+        if analysis is not None:
             # Store in session state
-            st.session_state.solar_df = solar_df
-            st.session_state.avg_irradiance = avg_irradiance
-            st.session_state.results = results
+            st.session_state.analysis = analysis
+            st.session_state.solar_df = analysis['solar_df']
+            st.session_state.avg_irradiance = analysis['avg_irradiance']
+            st.session_state.results = analysis['results']
         else:
             st.error("❌ Failed to fetch solar data. Please check your coordinates and try again.")
             st.session_state.analyzed = False
@@ -165,7 +317,7 @@ if st.session_state.analyzed:
         )
         col2.metric(
             "Payback Period",
-            f"{results['payback_period_years']:.1f} years"
+            format_payback(results['payback_period_years'])
         )
         col3.metric(
             "Annual Production",
@@ -179,7 +331,7 @@ if st.session_state.analyzed:
         # Additional info
         st.divider()
 
-        col_a, col_b = st.columns(2)
+        col_a, col_b, col_c = st.columns(3)
 
         with col_a:
             st.metric(
@@ -188,6 +340,12 @@ if st.session_state.analyzed:
             )
 
         with col_b:
+            st.metric(
+                f"Discounted Payback ({SolarROICalculator().discount_rate:.0%})",
+                format_payback(results['discounted_payback_years'])
+            )
+
+        with col_c:
             st.metric(
                 "Average Solar Irradiance",
                 f"{avg_irradiance:.2f} kWh/m²/day"
@@ -195,69 +353,124 @@ if st.session_state.analyzed:
 
         # Show irradiance chart
         st.divider()
-        st.subheader("📈 Daily Solar Irradiance - 2024")
+        st.subheader(f"📈 Daily Solar Irradiance - {WEATHER_OPTIONS[st.session_state.weather]}")
         st.line_chart(solar_df, use_container_width=True)
+        if st.session_state.weather != WEATHER_ACTUAL:
+            st.caption(
+                f"Built from NASA POWER daily data {TMY_START_YEAR}-{TMY_END_YEAR}: each month is the "
+                "most typical of its years, and P50/P90 rescale that year to the annual irradiance "
+                "exceeded in 50%/90% of years."
+            )
+
+        analysis = st.session_state.analysis
+        effective_rate = analysis['effective_rate']
+        projection = analysis['projection']
 
-        # Download data option
+        # Download data option (payloads are only built when a button is clicked)
         st.divider()
-        csv = solar_df.to_csv()
-        st.download_button(
-            label="📥 Download Solar Data (CSV)",
-            data=csv,
-            file_name=f"solar_data_{st.session_state.latitude}_{st.session_state.longitude}.csv",
-            mime="text/csv"
+        export_fmt = st.selectbox(
+            "Export format",
+            list(EXPORT_FORMATS),
+            format_func=lambda fmt: EXPORT_FORMATS[fmt][0],
+            key="export_fmt"
         )
+        export_stem = f"solar_data_{st.session_state.latitude}_{st.session_state.longitude}"
+        col_dl1, col_dl2 = st.columns(2)
+
+        with col_dl1:
+            st.download_button(
+                label=f"📥 Download Solar Data ({EXPORT_FORMATS[export_fmt][0]})",
+                data=lambda df=solar_df, fmt=export_fmt: export_dataframe(df, fmt),
+                file_name=file_name(export_stem, export_fmt),
+                mime=mime_type(export_fmt),
+                on_click="ignore"
+            )
+
+        with col_dl2:
+            bundle_frames = {
+                'irradiance': solar_df,
+                'cash_flows': cash_flow_frame(projection),
+                'comparison': None
+            }
+            if st.session_state.comparison_data is not None:
+                bundle_frames['comparison'] = st.session_state.comparison_data
+            st.download_button(
+                label="📦 Download Full Bundle (ZIP)",
+                data=lambda frames=bundle_frames, fmt=export_fmt: export_bundle(frames, fmt),
+                file_name=f"{export_stem}.zip",
+                mime="application/zip",
+                on_click="ignore"
+            )
 
         # Cash Flow Projection
         st.divider()
         st.subheader("💰 25-Year Cash Flow Projection")
 
-        import plotly.graph_objects as go
+        # Prebuilt by the cache warmer
+        fig = analysis['cash_flow_figure']
+        st.plotly_chart(fig, use_container_width=True)
 
-        years = list(range(0, 26))
-        cumulative_cash = [-results['total_investment']]
-        cash = -results['total_investment']
+        breakeven_year = results['payback_period_years']
+        if np.isfinite(breakeven_year):
+            st.info(f"💡 You'll break even in year {breakeven_year:.1f}. After that, it's pure profit!")
+        else:
+            st.warning("⚠️ This system doesn't break even within 25 years.")
 
-        for year in range(1, 26):
-            annual_revenue = (
-                results['annual_production_kwh'] *
-                st.session_state.electricity_rate *
-                ((1 - 0.005) ** year)
-            )
-            cash += annual_revenue
-            cumulative_cash.append(cash)
-
-        fig = go.Figure()
-
-        fig.add_trace(go.Scatter(
-            x=years,
-            y=cumulative_cash,
-            fill='tozeroy',
-            name='Cumulative Cash Flow',
-            line=dict(color='#10b981', width=3),
-            fillcolor='rgba(16, 185, 129, 0.2)'
+        # Equipment options
+        st.divider()
+        st.subheader("⚙️ Best Equipment Configurations")
+
+        # Equipment and tariff tables are kept with the shared analysis, so reruns reuse them
+        ambient_temp = st.slider("Average Daytime Temperature (°C)", -10, 45, 25, key="ambient_temp")
+        equipment_df = get_cache_warmer().view(analysis, ('equipment', ambient_temp), lambda: evaluate_equipment(
+            avg_irradiance,
+            st.session_state.system_size,
+            effective_rate,
+            ambient_temp_c=ambient_temp
         ))
+        equipment_config = {
+            'Performance Ratio': st.column_config.NumberColumn(format="percent"),
+            'Array Area (m²)': st.column_config.NumberColumn(format="%.0f"),
+            'Annual Production (kWh)': st.column_config.NumberColumn(format="localized"),
+            'Total Investment ($)': st.column_config.NumberColumn(format="dollar"),
+            'Net Profit ($)': st.column_config.NumberColumn(format="dollar"),
+            'ROI (%)': st.column_config.NumberColumn(format="%.1f%%"),
+            'Payback (years)': st.column_config.NumberColumn(format="%.1f"),
+        }
+        equipment_table, equipment_never = payback_table(equipment_df)
+        st.dataframe(equipment_table.head(10), use_container_width=True, hide_index=True, column_config=equipment_config)
+
+        with st.expander(f"All {len(equipment_df)} panel, inverter and mounting combinations"):
+            st.dataframe(equipment_table, use_container_width=True, hide_index=True, column_config=equipment_config)
+        if equipment_never:
+            st.caption(NEVER_PAYBACK_CAPTION)
+
+        # Tariff comparison: one production profile valued under every tariff in one call
+        st.divider()
+        st.subheader("💡 Tariff Comparison")
 
-        fig.add_hline(
-            y=0,
-            line_dash="dash",
-            line_color="red",
-            annotation_text="Break Even Point",
-            annotation_position="right"
+        load_shape, annual_load_kwh = st.session_state.site_load
+        tariff_df = get_cache_warmer().view(analysis, ('tariffs', load_shape, annual_load_kwh), lambda: compare_tariffs(
+            solar_df, st.session_state.latitude, st.session_state.system_size, load_shape, annual_load_kwh
+        ))
+        tariff_table, tariff_never = payback_table(tariff_df)
+        st.dataframe(
+            tariff_table,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                'Effective Rate ($/kWh)': st.column_config.NumberColumn(format="$%.3f"),
+                'First-Year Value ($)': st.column_config.NumberColumn(format="dollar"),
+                'ROI (%)': st.column_config.NumberColumn(format="%.1f%%"),
+                'Payback (years)': st.column_config.NumberColumn(format="%.1f"),
+            }
         )
-
-        fig.update_layout(
-            xaxis_title="Year",
-            yaxis_title="Cumulative Cash Flow ($)",
-            hovermode='x unified',
-            height=400
+        st.caption(
+            f"Valued against a {load_shape.lower()} site load of {annual_load_kwh:,.0f} kWh/year: production "
+            "used on site saves import prices and peak demand charges, the surplus earns each tariff's export rate."
+            + (f" {NEVER_PAYBACK_CAPTION}" if tariff_never else "")
         )
 
-        st.plotly_chart(fig, use_container_width=True)
-
-        breakeven_year = results['payback_period_years']
-        st.info(f"💡 You'll break even in year {breakeven_year:.1f}. After that, it's pure profit!")
-
         # Interactive Map
         st.divider()
         st.subheader("🗺️ Location Map")
@@ -277,7 +490,7 @@ if st.session_state.analyzed:
             <b>Solar Site Analysis</b><br>
             Irradiance: {avg_irradiance:.2f} kWh/m²/day<br>
             ROI: {results['roi_percent']:.1f}%<br>
-            Payback: {results['payback_period_years']:.1f} years
+            Payback: {format_payback(results['payback_period_years'])}
             """,
             icon=folium.Icon(color='orange', icon='sun', prefix='fa')
         ).add_to(m)
@@ -293,46 +506,53 @@ if st.session_state.analyzed:
 
         st_folium(m, width=700, height=400)
 
+        # PDF report, rendered in a background process
+        st.divider()
+        st.subheader("📄 PDF Report")
+
+        report_inputs = report_input(
+            st.session_state.latitude,
+            st.session_state.longitude,
+            st.session_state.system_size,
+            effective_rate,
+            results,
+            solar_df,
+            projection
+        )
+        # Job ids are report keys: a report for earlier inputs is stale once the analysis changes
+        if st.session_state.get('report_job') not in (None, report_key(report_inputs)):
+            st.session_state.report_job = None
+
+        if st.button("📄 Generate PDF Report"):
+            job_id = get_report_service().submit(report_inputs)
+            if job_id is None:
+                st.warning("⚠️ The report queue is busy. Please try again in a moment.")
+            st.session_state.report_job = job_id
+
+        report_job = st.session_state.get('report_job')
+        if report_job is not None:
+            report_service = get_report_service()
+            report_state = report_service.status(report_job)
+            if report_state == 'done':
+                st.download_button(
+                    label="📥 Download PDF Report",
+                    data=report_service.result(report_job),
+                    file_name=f"solar_report_{st.session_state.latitude}_{st.session_state.longitude}.pdf",
+                    mime="application/pdf",
+                    on_click="ignore"
+                )
+            elif report_state in ('queued', 'running'):
+                report_status(report_job)
+            else:
+                st.error("❌ Failed to generate the report. Please try again.")
+                st.session_state.report_job = None
+
         # Add comparison feature after analysis
         st.divider()
         st.subheader("🔄 Compare Multiple Locations")
 
-        with st.expander("📍 Compare 2-3 Locations Side-by-Side", expanded=False):
-            st.write("Enter coordinates for up to 3 locations to compare their solar potential:")
-
-            col1, col2, col3 = st.columns(3)
-
-            with col1:
-                st.write("**Location 1**")
-                lat1_post = st.number_input("Lat 1", -90.0, 90.0, 33.45, key="lat1_post")
-                lon1_post = st.number_input("Lon 1", -180.0, 180.0, -112.07, key="lon1_post")
-                name1_post = st.text_input("Name (optional)", "Phoenix, AZ", key="name1_post")
-
-            with col2:
-                st.write("**Location 2**")
-                lat2_post = st.number_input("Lat 2", -90.0, 90.0, 36.17, key="lat2_post")
-                lon2_post = st.number_input("Lon 2", -180.0, 180.0, -115.14, key="lon2_post")
-                name2_post = st.text_input("Name (optional)", "Las Vegas, NV", key="name2_post")
-
-            with col3:
-                st.write("**Location 3**")
-                lat3_post = st.number_input("Lat 3", -90.0, 90.0, 25.76, key="lat3_post")
-                lon3_post = st.number_input("Lon 3", -180.0, 180.0, -80.19, key="lon3_post")
-                name3_post = st.text_input("Name (optional)", "Miami, FL", key="name3_post")
-
-            comp_system_size_post = st.slider("System Size for Comparison (kW)", 10, 1000, 100, key="comp_size_post")
-            comp_elec_rate_post = st.slider("Electricity Rate for Comparison ($/kWh)", 0.05, 0.30, 0.12, 0.01, key="comp_rate_post")
-
-            if st.button("🔍 Compare Locations", type="primary", key="compare_post"):
-                st.session_state.comparison_done = True
-                st.session_state.comparison_locations = [
-                    (lat1_post, lon1_post, name1_post),
-                    (lat2_post, lon2_post, name2_post),
-                    (lat3_post, lon3_post, name3_post)
-                ]
-                st.session_state.comp_system_size = comp_system_size_post
-                st.session_state.comp_elec_rate = comp_elec_rate_post
-                st.session_state.comparison_data = None  # Reset comparison data
+        with st.expander("📍 Compare Locations Side-by-Side", expanded=False):
+            comparison_form(key_suffix="_post")
 
 else:
     # Welcome screen
@@ -343,41 +563,8 @@ else:
     # Add comparison feature
     st.subheader("🔄 Compare Multiple Locations")
 
-    with st.expander("📍 Compare 2-3 Locations Side-by-Side", expanded=False):
-        st.write("Enter coordinates for up to 3 locations to compare their solar potential:")
-
-        col1, col2, col3 = st.columns(3)
-
-        with col1:
-            st.write("**Location 1**")
-            lat1 = st.number_input("Lat 1", -90.0, 90.0, 33.45, key="lat1")
-            lon1 = st.number_input("Lon 1", -180.0, 180.0, -112.07, key="lon1")
-            name1 = st.text_input("Name (optional)", "Phoenix, AZ", key="name1")
-
-        with col2:
-            st.write("**Location 2**")
-            lat2 = st.number_input("Lat 2", -90.0, 90.0, 36.17, key="lat2")
-            lon2 = st.number_input("Lon 2", -180.0, 180.0, -115.14, key="lon2")
-            name2 = st.text_input("Name (optional)", "Las Vegas, NV", key="name2")
-
-        with col3:
-            st.write("**Location 3**")
-            lat3 = st.number_input("Lat 3", -90.0, 90.0, 25.76, key="lat3")
-            lon3 = st.number_input("Lon 3", -180.0, 180.0, -80.19, key="lon3")
-            name3 = st.text_input("Name (optional)", "Miami, FL", key="name3")
-
-        comp_system_size = st.slider("System Size for Comparison (kW)", 10, 1000, 100, key="comp_size")
-        comp_elec_rate = st.slider("Electricity Rate for Comparison ($/kWh)", 0.05, 0.30, 0.12, 0.01, key="comp_rate")
-
-        if st.button("🔍 Compare Locations", type="primary"):
-            st.session_state.comparison_done = True
-            st.session_state.comparison_locations = [
-                (lat1, lon1, name1),
-                (lat2, lon2, name2),
-                (lat3, lon3, name3)
-            ]
-            st.session_state.comp_system_size = comp_system_size
-            st.session_state.comp_elec_rate = comp_elec_rate
+    with st.expander("📍 Compare Locations Side-by-Side", expanded=False):
+        comparison_form()
 
     st.markdown("---")
 
@@ -409,36 +596,23 @@ if st.session_state.comparison_done:
 
     # Only fetch if we don't have data yet
     if st.session_state.comparison_data is None:
-        comparison_data = []
-
         progress_bar = st.progress(0)
         status_text = st.empty()
+        status_text.text(f"Fetching data for {len(locations)} locations...")
 
-        for idx, (lat, lon, name) in enumerate(locations):
-            status_text.text(f"Fetching data for {name}...")
+        def show_progress(done, total):
+            progress_bar.progress(done / total)
+            status_text.text(f"Fetched {done} of {total} locations...")
 
-            solar_df = get_solar_data(lat, lon, '2024-01-01', '2024-12-31')
-
-            if solar_df is not None:
-                avg_irradiance = solar_df['solar_irradiance'].mean()
-
-                calculator = SolarROICalculator()
-                results = calculator.calculate_roi(avg_irradiance, comp_system_size, comp_elec_rate)
-
-                comparison_data.append({
-                    'Location': name,
-                    'Latitude': lat,
-                    'Longitude': lon,
-                    'Avg Irradiance (kWh/m²/day)': f"{avg_irradiance:.2f}",
-                    'ROI (%)': f"{results['roi_percent']:.1f}%",
-                    'Payback (years)': f"{results['payback_period_years']:.1f}",
-                    'Annual Production (kWh)': f"{results['annual_production_kwh']:,.0f}",
-                    'Net Profit ($)': f"${results['net_profit']:,.0f}"
-                })
-
-            progress_bar.progress((idx + 1) / 3)
+        avg_irradiances = fetch_average_irradiance(
+            locations, ANALYSIS_START_DATE, ANALYSIS_END_DATE, progress=show_progress,
+            weather=st.session_state.comp_weather
+        )
+        comparison_data = compare_locations(locations, avg_irradiances, comp_system_size, comp_elec_rate)
 
-        status_text.text("✅ Comparison complete!")
+        failed = len(locations) - len(comparison_data)
+        status_text.text("✅ Comparison complete!" if failed == 0 else
+                         f"✅ Comparison complete ({failed} location(s) could not be fetched)")
         st.session_state.comparison_data = comparison_data
     else:
         comparison_data = st.session_state.comparison_data
@@ -446,23 +620,60 @@ if st.session_state.comparison_done:
     # Display comparison table
     st.subheader("📊 Comparison Results")
 
-    import pandas as pd
-    df_comparison = pd.DataFrame(comparison_data)
-    st.dataframe(df_comparison, use_container_width=True)
+    if comparison_data.empty:
+        st.error("❌ Failed to fetch solar data for every location. Please check your coordinates and try again.")
+        st.stop()
+
+    col_sort, col_order, col_page = st.columns([2, 1, 1])
+    sort_by = col_sort.selectbox("Sort by", ['Rank', 'Location'] + RESULT_COLUMNS, key="comp_sort")
+    ascending = col_order.radio("Order", ["Ascending", "Descending"], horizontal=True, key="comp_order") == "Ascending"
+    page_count = max(1, -(-len(comparison_data) // COMPARISON_PAGE_SIZE))
+    page = col_page.number_input("Page", 1, page_count, 1, key="comp_page")
+
+    sorted_comparison = comparison_data.sort_values(sort_by, ascending=ascending, kind='stable')
+    page_start = (page - 1) * COMPARISON_PAGE_SIZE
+    comparison_table, comparison_never = payback_table(comparison_data)
+    st.dataframe(
+        comparison_table.loc[sorted_comparison.index[page_start:page_start + COMPARISON_PAGE_SIZE]],
+        use_container_width=True,
+        hide_index=True,
+        column_config=COMPARISON_COLUMN_CONFIG
+    )
+    st.caption(f"Showing {page_start + 1}-{min(page_start + COMPARISON_PAGE_SIZE, len(comparison_data))} "
+               f"of {len(comparison_data)} locations (page {page} of {page_count})"
+               + (f". {NEVER_PAYBACK_CAPTION}" if comparison_never else ""))
+
+    comp_export_fmt = st.selectbox(
+        "Export format",
+        list(EXPORT_FORMATS),
+        format_func=lambda fmt: EXPORT_FORMATS[fmt][0],
+        key="comp_export_fmt"
+    )
+    st.download_button(
+        label=f"📥 Download Comparison ({EXPORT_FORMATS[comp_export_fmt][0]})",
+        data=lambda df=comparison_data, fmt=comp_export_fmt: export_dataframe(df, fmt),
+        file_name=file_name("solar_comparison", comp_export_fmt),
+        mime=mime_type(comp_export_fmt),
+        on_click="ignore"
+    )
 
     # Visual comparison charts
     st.subheader("📈 Visual Comparison")
+    if len(comparison_data) > COMPARISON_CHART_SITES:
+        st.caption(f"Charts show the top {COMPARISON_CHART_SITES} locations by ROI.")
 
     import plotly.graph_objects as go
 
+    top_sites = comparison_data.nsmallest(COMPARISON_CHART_SITES, 'Rank')
+
     # ROI Comparison Bar Chart
     fig_roi = go.Figure(data=[
         go.Bar(
-            x=[item['Location'] for item in comparison_data],
-            y=[float(item['ROI (%)'].strip('%')) for item in comparison_data],
-            text=[item['ROI (%)'] for item in comparison_data],
+            x=top_sites['Location'],
+            y=top_sites['ROI (%)'],
+            texttemplate='%{y:.1f}%',
             textposition='auto',
-            marker_color=['#10b981', '#3b82f6', '#f59e0b']
+            marker=dict(color=top_sites['ROI (%)'], colorscale='Emrld')
         )
     ])
     fig_roi.update_layout(
@@ -473,14 +684,16 @@ if st.session_state.comparison_done:
     )
     st.plotly_chart(fig_roi, use_container_width=True)
 
-    # Payback Period Comparison
+    # Payback Period Comparison; sites that never pay back have no bar
+    pays_back = np.isfinite(top_sites['Payback (years)'])
+    payback_sites = top_sites[pays_back]
     fig_payback = go.Figure(data=[
         go.Bar(
-            x=[item['Location'] for item in comparison_data],
-            y=[float(item['Payback (years)']) for item in comparison_data],
-            text=[item['Payback (years)'] for item in comparison_data],
+            x=payback_sites['Location'],
+            y=payback_sites['Payback (years)'],
+            texttemplate='%{y:.1f}',
             textposition='auto',
-            marker_color=['#ef4444', '#8b5cf6', '#ec4899']
+            marker=dict(color=payback_sites['Payback (years)'], colorscale='Purp')
         )
     ])
     fig_payback.update_layout(
@@ -490,25 +703,47 @@ if st.session_state.comparison_done:
         height=400
     )
     st.plotly_chart(fig_payback, use_container_width=True)
+    if not pays_back.all():
+        st.caption(f"Never pay back within 25 years: {', '.join(top_sites.loc[~pays_back, 'Location'])}")
 
     # Map with all locations
     st.subheader("🗺️ All Locations on Map")
 
     import folium
+    from folium.plugins import FastMarkerCluster
     from streamlit_folium import st_folium
 
     # Calculate center point
-    avg_lat = sum([loc[0] for loc in locations]) / 3
-    avg_lon = sum([loc[1] for loc in locations]) / 3
+    avg_lat = comparison_data['Latitude'].mean()
+    avg_lon = comparison_data['Longitude'].mean()
 
     m = folium.Map(location=[avg_lat, avg_lon], zoom_start=4)
-
-    colors = ['red', 'blue', 'green']
-    for idx, (lat, lon, name) in enumerate(locations):
-        folium.Marker(
-            [lat, lon],
-            popup=f"<b>{name}</b><br>{comparison_data[idx]['ROI (%)']} ROI",
-            icon=folium.Icon(color=colors[idx], icon='sun', prefix='fa')
+    if len(comparison_data) > 1:
+        m.fit_bounds([
+            [comparison_data['Latitude'].min(), comparison_data['Longitude'].min()],
+            [comparison_data['Latitude'].max(), comparison_data['Longitude'].max()]
+        ])
+
+    # Top third green, middle blue, bottom red
+    tercile = np.minimum(3 * (comparison_data['Rank'].to_numpy() - 1) // len(comparison_data), 2)
+    colors = np.array(['green', 'blue', 'red'])[tercile]
+    popups = [
+        f"<b>{name}</b><br>#{rank}: {roi:.1f}% ROI"
+        for name, rank, roi in zip(comparison_data['Location'], comparison_data['Rank'], comparison_data['ROI (%)'])
+    ]
+
+    if len(comparison_data) > MAP_CLUSTER_THRESHOLD:
+        # Markers are built in the browser from one data array, clustered
+        FastMarkerCluster(
+            data=list(zip(comparison_data['Latitude'], comparison_data['Longitude'], popups, colors)),
+            callback=FAST_MARKER_CALLBACK
         ).add_to(m)
+    else:
+        for lat, lon, popup, color in zip(comparison_data['Latitude'], comparison_data['Longitude'], popups, colors):
+            folium.Marker(
+                [lat, lon],
+                popup=popup,
+                icon=folium.Icon(color=color, icon='sun', prefix='fa')
+            ).add_to(m)
 
     st_folium(m, width=700, height=500)
@@ -0,0 +1,373 @@
+import glob
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from data.tmy import POWER_FILL_VALUE
+
+# Defaults for `python -m data.power_emulator`; all can also be passed to PowerEmulator
+EMULATOR_HOST = os.environ.get('POWER_EMULATOR_HOST', '127.0.0.1')
+EMULATOR_PORT = int(os.environ.get('POWER_EMULATOR_PORT', 8765))
+EMULATOR_LATENCY_MS = float(os.environ.get('POWER_EMULATOR_LATENCY_MS', 0))
+EMULATOR_JITTER_MS = float(os.environ.get('POWER_EMULATOR_JITTER_MS', 0))
+EMULATOR_MAX_RPS = float(os.environ.get('POWER_EMULATOR_MAX_RPS', 0))  # 0 = unlimited
+EMULATOR_BANDWIDTH_KBPS = float(os.environ.get('POWER_EMULATOR_BANDWIDTH_KBPS', 0))  # KiB/s, 0 = unlimited
+EMULATOR_ERROR_RATE = float(os.environ.get('POWER_EMULATOR_ERROR_RATE', 0))
+EMULATOR_HANG_RATE = float(os.environ.get('POWER_EMULATOR_HANG_RATE', 0))
+EMULATOR_FILL_RATE = float(os.environ.get('POWER_EMULATOR_FILL_RATE', 0))
+EMULATOR_RECORDINGS_DIR = os.environ.get('POWER_EMULATOR_RECORDINGS')
+EMULATOR_SEED = int(os.environ.get('POWER_EMULATOR_SEED', 0))
+
+GRID_DEGREES = 0.5  # synthetic data is constant within a grid cell, like POWER's solar grid
+MAX_REGION_DEGREES = 10  # largest regional request, per side
+HANG_SECONDS = 120  # injected hangs outlast any sensible client timeout
+CHUNK_BYTES = 16 * 1024
+
+PARAMETER = 'ALLSKY_SFC_SW_DWN'
+PARAMETER_INFO = {
+    'daily': {'units': 'kW-hr/m^2/day', 'longname': 'All Sky Surface Shortwave Downward Irradiance'},
+    'hourly': {'units': 'Wh/m^2', 'longname': 'All Sky Surface Shortwave Downward Irradiance'},
+}
+
+
+def _cell(value, offset):
+    # Non-negative grid index, usable as a random seed
+    return int(np.floor((float(value) + offset) / GRID_DEGREES))
+
+
+def _parse_date(value):
+    return datetime.strptime(value, '%Y%m%d').date()
+
+
+def _days(start, end):
+    return [start + timedelta(days=n) for n in range((end - start).days + 1)]
+
+
+class RequestError(Exception):
+    """A request the real API would reject with a 422"""
+
+
+class PowerEmulator:
+    """
+    Local stand-in for the NASA POWER API
+
+    Serves the daily and hourly point endpoints and the daily regional
+    endpoint with the same JSON shape as power.larc.nasa.gov, from
+    deterministic synthetic data (a clear-sky model with a per-cell climate
+    and daily weather noise) or from recorded point responses. Latency,
+    request-rate and bandwidth limits, errors and hangs can be injected.
+    Point get_solar_data at it with POWER_API_URL=<emulator url>.
+
+    GET /stats returns request counts; /stats?reset=1 clears them.
+    """
+
+    def __init__(self, host=EMULATOR_HOST, port=EMULATOR_PORT, latency_ms=EMULATOR_LATENCY_MS,
+                 jitter_ms=EMULATOR_JITTER_MS, max_rps=EMULATOR_MAX_RPS, bandwidth_kbps=EMULATOR_BANDWIDTH_KBPS,
+                 error_rate=EMULATOR_ERROR_RATE, hang_rate=EMULATOR_HANG_RATE, fill_rate=EMULATOR_FILL_RATE,
+                 recordings_dir=EMULATOR_RECORDINGS_DIR, seed=EMULATOR_SEED):
+        self.host = host
+        self.port = port
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.max_rps = max_rps
+        self.bandwidth_kbps = bandwidth_kbps
+        self.error_rate = error_rate
+        self.hang_rate = hang_rate
+        self.fill_rate = fill_rate
+        self.seed = seed
+        self.recordings = self._load_recordings(recordings_dir)
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._tokens = max_rps
+        self._refilled = time.monotonic()
+        self._rate_lock = threading.Lock()
+        self._stats = Counter()
+        self._stats_lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        """Base URL to use as POWER_API_URL"""
+        host, port = self._server.server_address[:2] if self._server else (self.host, self.port)
+        return f"http://{host}:{port}"
+
+    # Data
+
+    @staticmethod
+    def _load_recordings(directory):
+        # Recorded point responses (JSON saved from the real API), by grid cell
+        recordings = {}
+        if not directory:
+            return recordings
+        for path in glob.glob(os.path.join(directory, '*.json')):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    data = json.load(f)
+                lon, lat = data['geometry']['coordinates'][:2]
+                values = data['properties']['parameter'][PARAMETER]
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Error loading recording {path}: {e}")
+                continue
+            recordings.setdefault((_cell(lat, 90), _cell(lon, 180)), {}).update(values)
+        return recordings
+
+    def daily_values(self, lat, lon, days):
+        """Daily irradiance (kWh/m²/day) for a point, as POWER would report it"""
+        i, j = _cell(lat, 90), _cell(lon, 180)
+        cell_lat = (i + 0.5) * GRID_DEGREES - 90
+        doy = np.array([day.timetuple().tm_yday for day in days])
+
+        # Extraterrestrial daily insolation for the cell
+        phi = np.radians(cell_lat)
+        declination = np.radians(23.45) * np.sin(2 * np.pi * (284 + doy) / 365)
+        sunset = np.arccos(np.clip(-np.tan(phi) * np.tan(declination), -1, 1))
+        eccentricity = 1 + 0.033 * np.cos(2 * np.pi * doy / 365)
+        h0 = 24 / np.pi * 1.367 * eccentricity * (
+            np.cos(phi) * np.cos(declination) * np.sin(sunset) + sunset * np.sin(phi) * np.sin(declination)
+        )
+
+        # Each cell gets a climate; each cell-year its own weather, so a day's
+        # value doesn't depend on the requested range
+        climate = np.random.default_rng([self.seed, i, j]).uniform(0.45, 0.7)
+        years = np.array([day.year for day in days])
+        clearness = np.empty(len(days))
+        missing = np.zeros(len(days), dtype=bool)
+        for year in np.unique(years):
+            weather = np.random.default_rng([self.seed, i, j, int(year)])
+            noise = weather.normal(0, 0.12, 366)
+            gaps = weather.random(366) < self.fill_rate
+            in_year = years == year
+            clearness[in_year] = noise[doy[in_year] - 1]
+            missing[in_year] = gaps[doy[in_year] - 1]
+        values = np.round(h0 * np.clip(climate + clearness, 0.05, 0.8), 2)
+        values[missing] = POWER_FILL_VALUE
+
+        recorded = self.recordings.get((i, j), {})
+        keys = [day.strftime('%Y%m%d') for day in days]
+        return {key: float(recorded.get(key, value)) for key, value in zip(keys, values)}
+
+    def hourly_values(self, lat, lon, days):
+        """Hourly irradiance (Wh/m²) in local solar time, summing to the daily values"""
+        daily = self.daily_values(lat, lon, days)
+        hours = np.arange(24) + 0.5
+        values = {}
+        for day in days:
+            key = day.strftime('%Y%m%d')
+            total = daily[key]
+            doy = day.timetuple().tm_yday
+            declination = np.radians(23.45) * np.sin(2 * np.pi * (284 + doy) / 365)
+            sunset = np.arccos(np.clip(-np.tan(np.radians(lat)) * np.tan(declination), -1, 1))
+            hour_angle = np.radians(15 * (hours - 12))
+            shape = np.clip(np.cos(hour_angle) - np.cos(sunset), 0, None)
+            if total == POWER_FILL_VALUE or shape.sum() == 0:
+                hourly = np.full(24, POWER_FILL_VALUE if total == POWER_FILL_VALUE else 0.0)
+            else:
+                hourly = np.round(total * 1000 * shape / shape.sum(), 2)
+            values.update({f"{key}{hour:02d}": float(value) for hour, value in enumerate(hourly)})
+        return values
+
+    # Responses
+
+    @staticmethod
+    def _required(query, name, cast=float):
+        try:
+            return cast(query[name][0])
+        except (KeyError, IndexError, ValueError):
+            raise RequestError(f"Missing or invalid parameter: {name}")
+
+    def _range(self, query):
+        start = self._required(query, 'start', _parse_date)
+        end = self._required(query, 'end', _parse_date)
+        if end < start:
+            raise RequestError("The end date must be on or after the start date")
+        return _days(start, end)
+
+    def _check_parameters(self, query):
+        requested = self._required(query, 'parameters', str).upper().split(',')
+        if requested != [PARAMETER]:
+            raise RequestError(f"Only {PARAMETER} is emulated")
+
+    @staticmethod
+    def _feature(lat, lon, values):
+        return {
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [lon, lat, 0.0]},
+            'properties': {'parameter': {PARAMETER: values}},
+        }
+
+    def _point(self, query, resolution):
+        self._check_parameters(query)
+        lat = self._required(query, 'latitude')
+        lon = self._required(query, 'longitude')
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise RequestError("Coordinates out of range")
+        days = self._range(query)
+        values = self.daily_values(lat, lon, days) if resolution == 'daily' else self.hourly_values(lat, lon, days)
+        body = self._feature(lat, lon, values)
+        body.update({
+            'header': {
+                'title': 'NASA/POWER emulator',
+                'start': days[0].strftime('%Y%m%d'),
+                'end': days[-1].strftime('%Y%m%d'),
+                'fill_value': POWER_FILL_VALUE,
+            },
+            'messages': [],
+            'parameters': {PARAMETER: PARAMETER_INFO[resolution]},
+            'times': {'data': 0.0, 'process': 0.0},
+        })
+        return body
+
+    def _regional(self, query):
+        self._check_parameters(query)
+        lat_min, lat_max = self._required(query, 'latitude-min'), self._required(query, 'latitude-max')
+        lon_min, lon_max = self._required(query, 'longitude-min'), self._required(query, 'longitude-max')
+        if lat_max - lat_min > MAX_REGION_DEGREES or lon_max - lon_min > MAX_REGION_DEGREES:
+            raise RequestError(f"Regions are limited to {MAX_REGION_DEGREES} degrees per side")
+        if lat_max < lat_min or lon_max < lon_min:
+            raise RequestError("Invalid region bounds")
+        days = self._range(query)
+        lats = np.arange(lat_min, lat_max + 1e-9, GRID_DEGREES)
+        lons = np.arange(lon_min, lon_max + 1e-9, GRID_DEGREES)
+        return {
+            'type': 'FeatureCollection',
+            'features': [
+                self._feature(float(lat), float(lon), self.daily_values(lat, lon, days))
+                for lat in lats for lon in lons
+            ],
+            'header': {'title': 'NASA/POWER emulator', 'fill_value': POWER_FILL_VALUE},
+            'messages': [],
+            'parameters': {PARAMETER: PARAMETER_INFO['daily']},
+        }
+
+    def response(self, path, query):
+        """(status, body dict) for an API request, before injected faults"""
+        routes = {
+            '/api/temporal/daily/point': lambda: self._point(query, 'daily'),
+            '/api/temporal/hourly/point': lambda: self._point(query, 'hourly'),
+            '/api/temporal/daily/regional': lambda: self._regional(query),
+        }
+        if path not in routes:
+            return 404, {'messages': [f"Unknown endpoint: {path}"]}
+        try:
+            return 200, routes[path]()
+        except RequestError as e:
+            return 422, {'messages': [str(e)]}
+
+    # Faults and stats
+
+    def _draw(self):
+        with self._random_lock:
+            return self._random.random(), self._random.gauss(self.latency_ms, self.jitter_ms)
+
+    def _take_token(self):
+        # Token bucket holding up to one second of requests
+        if self.max_rps <= 0:
+            return True
+        with self._rate_lock:
+            now = time.monotonic()
+            self._tokens = min(self.max_rps, self._tokens + (now - self._refilled) * self.max_rps)
+            self._refilled = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def count(self, **counts):
+        with self._stats_lock:
+            self._stats.update(counts)
+
+    def stats(self, reset=False):
+        """Request counters: requests, per-endpoint and per-status counts, bytes sent"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+            if reset:
+                self._stats.clear()
+        return stats
+
+    # Server
+
+    def _handler(self):
+        emulator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body, headers=None):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                delay = 1 / (emulator.bandwidth_kbps * 1024) if emulator.bandwidth_kbps > 0 else 0
+                for offset in range(0, len(payload), CHUNK_BYTES):
+                    chunk = payload[offset:offset + CHUNK_BYTES]
+                    self.wfile.write(chunk)
+                    if delay:
+                        time.sleep(len(chunk) * delay)
+                emulator.count(**{f"status_{status}": 1, 'bytes_sent': len(payload)})
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                if url.path == '/stats':
+                    self._send(200, emulator.stats(reset='reset' in query))
+                    return
+
+                emulator.count(requests=1, **{url.path: 1})
+                draw, latency_ms = emulator._draw()
+                if not emulator._take_token():
+                    self._send(429, {'messages': ['Rate limit exceeded']}, {'Retry-After': '1'})
+                    return
+                time.sleep(max(latency_ms, 0) / 1000)
+                if draw < emulator.hang_rate:
+                    emulator.count(hangs=1)
+                    time.sleep(HANG_SECONDS)
+                    self.close_connection = True
+                    return
+                if draw < emulator.hang_rate + emulator.error_rate:
+                    self._send(503, {'messages': ['Injected error']})
+                    return
+                self._send(*emulator.response(url.path, query))
+
+        return Handler
+
+    def start(self):
+        """Serve in a daemon thread; port 0 picks a free port (see url)"""
+        if self._server is None:
+            self._server = ThreadingHTTPServer((self.host, self.port), self._handler())
+            self._server.daemon_threads = True
+            self._thread = threading.Thread(target=self._server.serve_forever, name='power-emulator', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Shut the server down"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+# Run the emulator
+if __name__ == "__main__":
+    emulator = PowerEmulator().start()
+    print(f"✅ NASA POWER emulator at {emulator.url} (set POWER_API_URL to use it)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        emulator.stop()
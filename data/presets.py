@@ -0,0 +1,15 @@
+# Locations offered as one-click presets in the sidebar and used as the
+# default comparison set. The cache warmer precomputes their analyses.
+PRESET_LOCATIONS = [
+    {'name': 'Phoenix, AZ', 'icon': '☀️', 'latitude': 33.45, 'longitude': -112.07},
+    {'name': 'Las Vegas, NV', 'icon': '🎰', 'latitude': 36.17, 'longitude': -115.14},
+    {'name': 'Miami, FL', 'icon': '🏖️', 'latitude': 25.76, 'longitude': -80.19},
+]
+
+# Analysis period used throughout the app
+ANALYSIS_START_DATE = '2024-01-01'
+ANALYSIS_END_DATE = '2024-12-31'
+
+# Default sidebar parameters
+DEFAULT_SYSTEM_SIZE_KW = 100
+DEFAULT_ELECTRICITY_RATE = 0.12
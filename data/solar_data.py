@@ -1,12 +1,52 @@
-import requests
+import os
+import threading
+import time
+from collections import OrderedDict
+
 import pandas as pd
 
-def get_solar_data(lat, lon, start_date, end_date):
+SOLAR_DATA_TTL_SECONDS = int(os.environ.get('SOLAR_DATA_TTL_SECONDS', 6 * 3600))
+SOLAR_DATA_CACHE_SIZE = 512  # responses kept in memory, shared by all sessions
+# Set to a local stand-in (see data/power_emulator.py) for offline work and load tests
+POWER_API_URL = os.environ.get('POWER_API_URL', 'https://power.larc.nasa.gov')
+SOLAR_DATA_TIMEOUT_SECONDS = float(os.environ.get('SOLAR_DATA_TIMEOUT_SECONDS', 60))
+SOLAR_DATA_RETRIES = int(os.environ.get('SOLAR_DATA_RETRIES', 2))
+SOLAR_DATA_RETRY_BACKOFF_SECONDS = 0.5  # doubled after each failed attempt
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+CACHE_DIR = os.environ.get(
+    'SOLAR_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache')
+)
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _cache_key(lat, lon, start_date, end_date):
+    return (round(float(lat), 4), round(float(lon), 4), start_date, end_date)
+
+
+def get_solar_data(lat, lon, start_date, end_date, refresh=False):
     """
     Fetch solar irradiance from NASA POWER API
     Free, no authentication required!
+    
+    Responses are cached in memory for SOLAR_DATA_TTL_SECONDS and shared
+    across sessions, so the returned DataFrame must not be modified.
+    Pass refresh=True to skip the cache and re-fetch. Rate limits, server
+    errors and connection failures are retried SOLAR_DATA_RETRIES times.
     """
-    base_url = "https://power.larc.nasa.gov/api/temporal/daily/point"
+    key = _cache_key(lat, lon, start_date, end_date)
+    if not refresh:
+        with _cache_lock:
+            cached = _cache.get(key)
+        if cached is not None and time.time() - cached[0] < SOLAR_DATA_TTL_SECONDS:
+            return cached[1]
+
+    # Imported here: requests is only needed on a cache miss and adds to app startup
+    import requests
+
+    base_url = f"{POWER_API_URL.rstrip('/')}/api/temporal/daily/point"
     
     params = {
         'parameters': 'ALLSKY_SFC_SW_DWN',  # Solar irradiance
@@ -19,7 +59,17 @@ def get_solar_data(lat, lon, start_date, end_date):
     }
     
     try:
-        response = requests.get(base_url, params=params)
+        for attempt in range(SOLAR_DATA_RETRIES + 1):
+            retry = attempt < SOLAR_DATA_RETRIES
+            try:
+                response = requests.get(base_url, params=params, timeout=SOLAR_DATA_TIMEOUT_SECONDS)
+            except (requests.ConnectionError, requests.Timeout):
+                if not retry:
+                    raise
+            else:
+                if not (retry and response.status_code in RETRY_STATUS_CODES):
+                    break
+            time.sleep(SOLAR_DATA_RETRY_BACKOFF_SECONDS * 2 ** attempt)
         response.raise_for_status()
         data = response.json()
         
@@ -29,12 +79,18 @@ def get_solar_data(lat, lon, start_date, end_date):
             orient='index',
             columns=['solar_irradiance']
         )
-        
-        return df
     except Exception as e:
         print(f"Error fetching data: {e}")
         return None
 
+    with _cache_lock:
+        _cache[key] = (time.time(), df)
+        _cache.move_to_end(key)
+        while len(_cache) > SOLAR_DATA_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+    return df
+
 # Test the function
 if __name__ == "__main__":
     # Test with San Francisco coordinates
@@ -0,0 +1,236 @@
+import os
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+from data.solar_data import CACHE_DIR, get_solar_data
+
+TMY_START_YEAR = int(os.environ.get('TMY_START_YEAR', 2001))
+TMY_END_YEAR = int(os.environ.get('TMY_END_YEAR', 2024))
+TMY_CACHE_DIR = os.path.join(CACHE_DIR, 'tmy')
+POWER_FILL_VALUE = -999  # NASA POWER marks missing days with this
+
+# Weather bases the app can analyse: the single analysis year, the typical
+# year, and the typical year rescaled to the P50 / P90 annual irradiance
+WEATHER_ACTUAL = 'actual'
+WEATHER_TMY = 'tmy'
+WEATHER_P50 = 'p50'
+WEATHER_P90 = 'p90'
+
+# Month-day labels of the 365-day TMY calendar (no Feb 29)
+CALENDAR_DAYS = pd.date_range('2001-01-01', '2001-12-31')
+
+_memory_cache = {}
+_memory_lock = threading.Lock()
+
+
+def _daily_frame(history):
+    # Clean daily values with calendar columns; Feb 29 is dropped so every year has 365 days
+    dates = pd.to_datetime(history.index, format='%Y%m%d')
+    df = pd.DataFrame({
+        'value': history['solar_irradiance'].to_numpy(dtype=float),
+        'year': dates.year,
+        'month': dates.month,
+        'day': dates.day,
+    })
+    df.loc[df['value'] <= POWER_FILL_VALUE + 1, 'value'] = np.nan
+    return df[~((df['month'] == 2) & (df['day'] == 29))].dropna(subset=['value'])
+
+
+def build_tmy(history):
+    """
+    Typical Meteorological Year from multi-year daily irradiance
+
+    For each calendar month, every year's month is scored with the
+    Finkelstein-Schafer statistic (mean absolute distance between the
+    month's empirical CDF and the long-term CDF of that calendar month);
+    the lowest-scoring year among those with the fewest missing days is
+    chosen, so complete months win when any exist. Days still missing are
+    filled with that calendar day's long-term mean, or interpolated when
+    the day was never observed (source_year 0 for months with no data).
+
+    Parameters:
+    - history: DataFrame from get_solar_data covering several years
+
+    Returns: DataFrame with 365 rows indexed 'MMDD', with solar_irradiance
+    and source_year columns. Raises ValueError if the history has no valid
+    days.
+    """
+    df = _daily_frame(history)
+    if df.empty:
+        raise ValueError("History has no valid days")
+
+    # Both CDFs are evaluated at the candidate month's own daily values
+    long_term_cdf = df.groupby('month')['value'].rank(method='max', pct=True)
+    month_cdf = df.groupby(['year', 'month'])['value'].rank(method='max', pct=True)
+    df['distance'] = (long_term_cdf - month_cdf).abs()
+
+    stats = df.groupby(['year', 'month']).agg(fs=('distance', 'mean'), days=('value', 'size')).reset_index()
+    days_in_month = CALENDAR_DAYS.month.value_counts()
+    stats['missing'] = days_in_month.reindex(stats['month']).to_numpy() - stats['days']
+
+    best = stats.sort_values(['missing', 'fs']).drop_duplicates('month')
+    source_years = best.set_index('month')['year']
+    selected = pd.MultiIndex.from_frame(best[['year', 'month']])
+
+    chosen = df[pd.MultiIndex.from_frame(df[['year', 'month']]).isin(selected)]
+    labels = lambda months, days: [f"{month:02d}{day:02d}" for month, day in zip(months, days)]
+    calendar = pd.Index(labels(CALENDAR_DAYS.month, CALENDAR_DAYS.day), name='date')
+
+    values = pd.Series(chosen['value'].to_numpy(), index=labels(chosen['month'], chosen['day'])).reindex(calendar)
+    day_means = df.groupby(['month', 'day'])['value'].mean()
+    values = values.fillna(pd.Series(day_means.to_numpy(), index=labels(*zip(*day_means.index))))
+    return pd.DataFrame(
+        {
+            'solar_irradiance': values.interpolate(limit_direction='both').to_numpy(),
+            'source_year': source_years.reindex(CALENDAR_DAYS.month).fillna(0).to_numpy(dtype=int),
+        },
+        index=calendar
+    )
+
+
+def annual_percentiles(history, exceedance=(50, 90)):
+    """
+    Annual-mean irradiance exceeded in the given share of years
+
+    P90 is the level exceeded in 90% of years (the 10th percentile of
+    complete years' means).
+
+    Returns: Dictionary like {'P50': 5.41, 'P90': 5.18} in kWh/m²/day,
+    with None values when no year is complete
+    """
+    df = _daily_frame(history)
+    counts = df.groupby('year')['value'].size()
+    means = df.groupby('year')['value'].mean()[counts >= len(CALENDAR_DAYS)]
+    if means.empty:
+        return {f"P{p}": None for p in exceedance}
+    return {f"P{p}": float(np.percentile(means, 100 - p)) for p in exceedance}
+
+
+def _cache_path(lat, lon, start_year, end_year):
+    return os.path.join(TMY_CACHE_DIR, f"{lat:.2f}_{lon:.2f}_{start_year}_{end_year}.npz")
+
+
+def _read_cache(path):
+    # Any unreadable file (partial, corrupt, older layout) counts as a miss
+    try:
+        with np.load(path) as saved:
+            values = saved['values'].astype(float)
+            source_years = saved['source_years'].astype(int)
+            days = saved['days'].astype(str)
+            p50, p90 = (None if np.isnan(p) else float(p) for p in saved['percentiles'])
+    except Exception as e:
+        print(f"Error reading cached TMY {path}: {e}")
+        return None
+    tmy = pd.DataFrame({'solar_irradiance': values, 'source_year': source_years}, index=pd.Index(days, name='date'))
+    return {'tmy': tmy, 'P50': p50, 'P90': p90}
+
+
+def _write_cache(path, entry):
+    # Written to a temporary file and renamed into place, so readers and
+    # concurrent builders of the same site never see a partial file
+    tmp_path = None
+    try:
+        os.makedirs(TMY_CACHE_DIR, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=TMY_CACHE_DIR, suffix='.npz.tmp', delete=False) as tmp:
+            tmp_path = tmp.name
+            np.savez_compressed(
+                tmp,
+                values=entry['tmy']['solar_irradiance'].to_numpy(dtype=np.float32),
+                source_years=entry['tmy']['source_year'].to_numpy(dtype=np.uint16),
+                days=entry['tmy'].index.to_numpy(dtype='U4'),
+                percentiles=np.array([entry['P50'], entry['P90']], dtype=np.float32),
+            )
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Error caching TMY: {e}")
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_tmy(lat, lon, start_year=TMY_START_YEAR, end_year=TMY_END_YEAR):
+    """
+    TMY and annual percentiles for a site, built once and then cached
+
+    Results are kept in memory and saved as a compact .npz (float32 values,
+    uint16 source years, the 'MMDD' index) under TMY_CACHE_DIR, so later
+    sessions reuse them without re-fetching the history.
+
+    Returns: Dictionary with 'tmy' (DataFrame from build_tmy), 'P50' and
+    'P90' (None without a complete year), or None if the history could not
+    be fetched or has no valid days
+    """
+    lat, lon = round(float(lat), 2), round(float(lon), 2)
+    key = (lat, lon, start_year, end_year)
+    with _memory_lock:
+        if key in _memory_cache:
+            return _memory_cache[key]
+
+    path = _cache_path(lat, lon, start_year, end_year)
+    entry = _read_cache(path) if os.path.exists(path) else None
+    if entry is None:
+        history = get_solar_data(lat, lon, f"{start_year}-01-01", f"{end_year}-12-31")
+        if history is None or _daily_frame(history).empty:
+            return None
+        percentiles = annual_percentiles(history)
+        entry = {'tmy': build_tmy(history), 'P50': percentiles['P50'], 'P90': percentiles['P90']}
+        _write_cache(path, entry)
+
+    with _memory_lock:
+        _memory_cache[key] = entry
+    return entry
+
+
+def weather_series(lat, lon, weather):
+    """
+    Daily irradiance for a site under a TMY-based weather basis
+
+    Parameters:
+    - lat, lon: Site coordinates
+    - weather: WEATHER_TMY, WEATHER_P50 or WEATHER_P90. The percentile bases
+      keep the TMY's daily shape, rescaled to the percentile's annual mean.
+
+    Returns: DataFrame with a solar_irradiance column (365 days), or None
+    (also for P50 / P90 when the history has no complete year)
+    """
+    entry = load_tmy(lat, lon)
+    if entry is None:
+        return None
+    tmy = entry['tmy'][['solar_irradiance']]
+    if weather == WEATHER_TMY:
+        return tmy
+    target = entry['P50'] if weather == WEATHER_P50 else entry['P90']
+    if target is None:
+        return None
+    return tmy * (target / tmy['solar_irradiance'].mean())
+
+
+# Test the TMY builder
+if __name__ == "__main__":
+    import time
+
+    print("Testing TMY builder...")
+    dates = pd.date_range('1985-01-01', '2024-12-31')
+    rng = np.random.default_rng(0)
+    seasonal = 5 + 2 * np.sin(2 * np.pi * (dates.dayofyear - 80) / 365)
+    history = pd.DataFrame(
+        {'solar_irradiance': seasonal + rng.normal(0, 1, len(dates))},
+        index=dates.strftime('%Y%m%d')
+    )
+    history.iloc[100:110] = POWER_FILL_VALUE
+
+    start = time.perf_counter()
+    tmy = build_tmy(history)
+    print(f"✅ Built TMY from {dates.year.nunique()} years in {(time.perf_counter() - start) * 1000:.1f} ms")
+    print(f"✅ {len(tmy)} days, source years: {tmy.groupby(tmy.index.str[:2])['source_year'].first().tolist()}")
+    print(f"✅ Percentiles: {annual_percentiles(history)}")
+
+    # A day missing in every year still gives a full TMY; no complete year gives no percentiles
+    gappy = history.copy()
+    gappy.iloc[np.flatnonzero(gappy.index.str.endswith('0315'))] = POWER_FILL_VALUE
+    tmy = build_tmy(gappy)
+    assert len(tmy) == 365 and not tmy['solar_irradiance'].isna().any()
+    assert annual_percentiles(gappy) == {'P50': None, 'P90': None}
+    print(f"✅ Gap in every year: {len(tmy)} days, Mar 15 = {tmy.loc['0315', 'solar_irradiance']:.2f} (interpolated)")
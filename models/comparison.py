@@ -0,0 +1,153 @@
+import io
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from data.solar_data import get_solar_data
+from data.tmy import WEATHER_ACTUAL, weather_series
+from models.roi_calculator import SolarROICalculator
+
+MAX_FETCH_WORKERS = 8  # concurrent NASA POWER requests per comparison
+
+# Accepted spellings for the location columns in pasted or uploaded tables
+COLUMN_ALIASES = {
+    'name': 'Location', 'location': 'Location', 'site': 'Location',
+    'lat': 'Latitude', 'latitude': 'Latitude',
+    'lon': 'Longitude', 'lng': 'Longitude', 'long': 'Longitude', 'longitude': 'Longitude',
+}
+
+# Numeric result columns, in display order
+RESULT_COLUMNS = [
+    'Avg Irradiance (kWh/m²/day)',
+    'ROI (%)',
+    'Payback (years)',
+    'Annual Production (kWh)',
+    'Net Profit ($)',
+]
+
+
+def parse_locations(source):
+    """
+    Normalize a table of locations
+
+    Parameters:
+    - source: DataFrame, CSV text or a file-like CSV upload with name (optional),
+      latitude and longitude columns
+
+    Returns: DataFrame with Location, Latitude and Longitude columns; rows with
+    missing or out-of-range coordinates are dropped
+    """
+    if isinstance(source, pd.DataFrame):
+        df = source.copy()
+    elif isinstance(source, str):
+        df = pd.read_csv(io.StringIO(source))
+    else:
+        df = pd.read_csv(source)
+
+    df = df.rename(columns=lambda col: COLUMN_ALIASES.get(str(col).strip().lower(), col))
+    if 'Latitude' not in df.columns or 'Longitude' not in df.columns:
+        raise ValueError("Locations need latitude and longitude columns")
+
+    df['Latitude'] = pd.to_numeric(df['Latitude'], errors='coerce')
+    df['Longitude'] = pd.to_numeric(df['Longitude'], errors='coerce')
+    df = df[df['Latitude'].between(-90, 90) & df['Longitude'].between(-180, 180)]
+
+    if 'Location' not in df.columns:
+        df['Location'] = None
+    default_names = df['Latitude'].map('{:.2f}'.format) + ', ' + df['Longitude'].map('{:.2f}'.format)
+    names = df['Location'].astype('string').str.strip()
+    df['Location'] = names.mask(names.isna() | (names == ''), default_names).astype(str)
+
+    return df[['Location', 'Latitude', 'Longitude']].reset_index(drop=True)
+
+
+def fetch_average_irradiance(locations, start_date, end_date, progress=None, fetch=get_solar_data,
+                             weather=WEATHER_ACTUAL):
+    """
+    Average daily irradiance for every location, fetched concurrently
+
+    Parameters:
+    - locations: DataFrame from parse_locations
+    - start_date, end_date: Date range passed to the fetch function
+    - progress: Optional callback(done, total), called from the calling thread
+    - fetch: Data source with the get_solar_data signature
+    - weather: WEATHER_ACTUAL to use fetch over the date range, or a TMY-based
+      basis from data.tmy
+
+    Returns: Float array aligned with locations (NaN where the fetch failed)
+    """
+    total = len(locations)
+    averages = np.full(total, np.nan)
+    if total == 0:
+        return averages
+
+    if weather != WEATHER_ACTUAL:
+        fetch = lambda lat, lon, start_date, end_date: weather_series(lat, lon, weather)
+
+    lats = locations['Latitude'].to_numpy()
+    lons = locations['Longitude'].to_numpy()
+
+    with ThreadPoolExecutor(max_workers=min(MAX_FETCH_WORKERS, total)) as pool:
+        futures = {
+            pool.submit(fetch, lats[idx], lons[idx], start_date, end_date): idx
+            for idx in range(total)
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            # One failing site leaves its NaN; the rest of the comparison goes on
+            try:
+                solar_df = future.result()
+            except Exception as e:
+                print(f"Error fetching data for location {futures[future]}: {e}")
+                solar_df = None
+            if solar_df is not None:
+                averages[futures[future]] = solar_df['solar_irradiance'].mean()
+            if progress is not None:
+                progress(done, total)
+
+    return averages
+
+
+def compare_locations(locations, avg_irradiance, system_size_kw, electricity_rate=0.12, calculator=None):
+    """
+    Numeric comparison table for many locations
+
+    Parameters:
+    - locations: DataFrame from parse_locations
+    - avg_irradiance: Array of average daily irradiance, aligned with locations
+    - system_size_kw: System size in kilowatts
+    - electricity_rate: Cost per kWh in USD
+    - calculator: SolarROICalculator to use (default settings if omitted)
+
+    Returns: DataFrame ranked by ROI (Rank 1 is best); locations without data are dropped
+    """
+    calculator = calculator or SolarROICalculator()
+    avg_irradiance = np.asarray(avg_irradiance, dtype=float)
+    results = calculator.calculate_roi_batch(avg_irradiance, system_size_kw, electricity_rate)
+
+    df = locations[['Location', 'Latitude', 'Longitude']].copy()
+    df['Avg Irradiance (kWh/m²/day)'] = avg_irradiance
+    df['ROI (%)'] = results['roi_percent']
+    df['Payback (years)'] = results['payback_period_years']
+    df['Annual Production (kWh)'] = results['annual_production_kwh']
+    df['Net Profit ($)'] = results['net_profit']
+    df = df[np.isfinite(avg_irradiance)]
+
+    df.insert(0, 'Rank', df['ROI (%)'].rank(ascending=False, method='min').astype(int))
+    return df.sort_values('Rank', kind='stable').reset_index(drop=True)
+
+
+# Test the comparison
+if __name__ == "__main__":
+    import time
+
+    print("Testing comparison...")
+    rng = np.random.default_rng(0)
+    locations = parse_locations(pd.DataFrame({
+        'lat': rng.uniform(-60, 60, 500),
+        'lon': rng.uniform(-180, 180, 500),
+    }))
+    start = time.perf_counter()
+    df = compare_locations(locations, rng.uniform(2, 7, len(locations)), 100, 0.12)
+    print(f"✅ Compared {len(df)} locations in {(time.perf_counter() - start) * 1000:.1f} ms")
+    print(df.head())
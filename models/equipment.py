@@ -0,0 +1,176 @@
+import numpy as np
+import pandas as pd
+
+from models.roi_calculator import SolarROICalculator
+
+# Wiring, soiling, mismatch and availability losses not covered by the
+# equipment below. A monocrystalline panel, string inverter and fixed
+# ground mount at 25°C ambient come to a 77% performance ratio, close to
+# the calculator's 75% default.
+BALANCE_OF_SYSTEM_RATIO = 0.86
+
+SOFT_COST_PER_KW = 250  # USD per kW for installation labour, permitting and interconnection
+
+# Panels
+# - efficiency: module efficiency at STC (sets array area for a given kW)
+# - temp_coefficient: power change per °C of cell temperature above 25°C
+# - degradation_rate: yearly output loss
+# - cost_per_kw: USD per kW of panels
+PANELS = [
+    {'name': 'Polycrystalline', 'efficiency': 0.17, 'temp_coefficient': -0.0040, 'degradation_rate': 0.0070, 'cost_per_kw': 280},
+    {'name': 'Monocrystalline PERC', 'efficiency': 0.20, 'temp_coefficient': -0.0035, 'degradation_rate': 0.0050, 'cost_per_kw': 330},
+    {'name': 'Bifacial PERC', 'efficiency': 0.21, 'temp_coefficient': -0.0034, 'degradation_rate': 0.0045, 'cost_per_kw': 370},
+    {'name': 'TOPCon', 'efficiency': 0.225, 'temp_coefficient': -0.0030, 'degradation_rate': 0.0040, 'cost_per_kw': 400},
+    {'name': 'Heterojunction', 'efficiency': 0.23, 'temp_coefficient': -0.0026, 'degradation_rate': 0.0025, 'cost_per_kw': 460},
+    {'name': 'Thin-film CdTe', 'efficiency': 0.19, 'temp_coefficient': -0.0028, 'degradation_rate': 0.0050, 'cost_per_kw': 300},
+]
+
+# Inverters
+# - efficiency: weighted conversion efficiency
+# - temp_coefficient: output change per °C of ambient temperature above 25°C (thermal derating)
+# - degradation_rate: yearly efficiency loss
+# - cost_per_kw: USD per kW of inverter capacity
+INVERTERS = [
+    {'name': 'String', 'efficiency': 0.970, 'temp_coefficient': -0.0010, 'degradation_rate': 0.0005, 'cost_per_kw': 120},
+    {'name': 'Central', 'efficiency': 0.980, 'temp_coefficient': -0.0015, 'degradation_rate': 0.0005, 'cost_per_kw': 80},
+    {'name': 'Microinverter', 'efficiency': 0.965, 'temp_coefficient': -0.0005, 'degradation_rate': 0.0003, 'cost_per_kw': 250},
+    {'name': 'String + Optimizers', 'efficiency': 0.985, 'temp_coefficient': -0.0008, 'degradation_rate': 0.0004, 'cost_per_kw': 190},
+]
+
+# Mounting types
+# - yield_factor: yield relative to a fixed, optimally tilted mount
+# - cell_temp_rise_c: operating cell temperature rise above ambient, in °C
+# - degradation_rate: yearly yield loss from mechanical wear (trackers)
+# - cost_per_m2: USD per m² of array area (racking, land and labour)
+MOUNTINGS = [
+    {'name': 'Roof Flush', 'yield_factor': 0.95, 'cell_temp_rise_c': 30.0, 'degradation_rate': 0.0000, 'cost_per_m2': 45},
+    {'name': 'Fixed Tilt Ground', 'yield_factor': 1.00, 'cell_temp_rise_c': 22.0, 'degradation_rate': 0.0000, 'cost_per_m2': 60},
+    {'name': 'Single-Axis Tracker', 'yield_factor': 1.18, 'cell_temp_rise_c': 20.0, 'degradation_rate': 0.0010, 'cost_per_m2': 95},
+    {'name': 'Dual-Axis Tracker', 'yield_factor': 1.30, 'cell_temp_rise_c': 20.0, 'degradation_rate': 0.0020, 'cost_per_m2': 150},
+]
+
+
+def _as_frame(items):
+    return items.reset_index(drop=True) if isinstance(items, pd.DataFrame) else pd.DataFrame(items)
+
+
+def _take(frame, index):
+    # Column arrays gathered at index, one entry per combination
+    return {col: frame[col].to_numpy()[index] for col in frame.columns}
+
+
+def equipment_parameters(panel, inverter, mounting, ambient_temp_c=25.0):
+    """
+    Calculator parameters for a panel, inverter and mounting combination
+
+    Parameters:
+    - panel, inverter, mounting: Catalog entries (dicts); values may be
+      equal-length arrays to get one result per combination
+    - ambient_temp_c: Average daytime ambient temperature in °C
+
+    Returns: Dictionary of SolarROICalculator constructor arguments
+    """
+    cell_temp = ambient_temp_c + np.asarray(mounting['cell_temp_rise_c'], dtype=float)
+    panel_temp_factor = 1 + np.asarray(panel['temp_coefficient'], dtype=float) * (cell_temp - 25)
+    inverter_temp_factor = 1 + np.asarray(inverter['temp_coefficient'], dtype=float) * max(ambient_temp_c - 25, 0)
+    panel_efficiency = np.asarray(panel['efficiency'], dtype=float)
+
+    performance_ratio = (
+        BALANCE_OF_SYSTEM_RATIO *
+        panel_temp_factor *
+        np.asarray(inverter['efficiency'], dtype=float) * inverter_temp_factor *
+        np.asarray(mounting['yield_factor'], dtype=float)
+    )
+
+    # Racking and land scale with array area, which shrinks as efficiency rises
+    area_m2_per_kw = SolarROICalculator(panel_efficiency=panel_efficiency).array_area_m2(1.0)
+    system_cost_per_kw = (
+        np.asarray(panel['cost_per_kw'], dtype=float) +
+        np.asarray(inverter['cost_per_kw'], dtype=float) +
+        area_m2_per_kw * np.asarray(mounting['cost_per_m2'], dtype=float) +
+        SOFT_COST_PER_KW
+    )
+
+    # Components degrade independently
+    degradation_rate = 1 - (
+        (1 - np.asarray(panel['degradation_rate'], dtype=float)) *
+        (1 - np.asarray(inverter['degradation_rate'], dtype=float)) *
+        (1 - np.asarray(mounting['degradation_rate'], dtype=float))
+    )
+
+    return {
+        'panel_efficiency': panel_efficiency,
+        'performance_ratio': performance_ratio,
+        'system_cost_per_kw': system_cost_per_kw,
+        'degradation_rate': degradation_rate,
+    }
+
+
+def calculator_for_equipment(panel, inverter, mounting, ambient_temp_c=25.0):
+    """SolarROICalculator configured for one panel, inverter and mounting combination"""
+    params = equipment_parameters(panel, inverter, mounting, ambient_temp_c)
+    return SolarROICalculator(**{key: float(value) for key, value in params.items()})
+
+
+def evaluate_equipment(avg_solar_irradiance, system_size_kw, electricity_rate=0.12, years=25,
+                       ambient_temp_c=25.0, panels=None, inverters=None, mountings=None):
+    """
+    Evaluate every panel, inverter and mounting combination for one site
+
+    Parameters:
+    - avg_solar_irradiance: Average daily solar irradiance (kWh/m²/day)
+    - system_size_kw: System size in kilowatts
+    - electricity_rate: Cost per kWh in USD
+    - years: Investment period (default 25 years)
+    - ambient_temp_c: Average daytime ambient temperature in °C
+    - panels, inverters, mountings: Catalogs (lists of dicts or DataFrames);
+      default to the built-in PANELS, INVERTERS and MOUNTINGS
+
+    Returns: DataFrame with one row per combination, ranked by ROI (Rank 1 is best)
+    """
+    panels = _as_frame(PANELS if panels is None else panels)
+    inverters = _as_frame(INVERTERS if inverters is None else inverters)
+    mountings = _as_frame(MOUNTINGS if mountings is None else mountings)
+
+    # Index of every combination, flattened to one axis
+    p, i, m = (
+        axis.ravel() for axis in
+        np.meshgrid(np.arange(len(panels)), np.arange(len(inverters)), np.arange(len(mountings)), indexing='ij')
+    )
+    params = equipment_parameters(_take(panels, p), _take(inverters, i), _take(mountings, m), ambient_temp_c)
+
+    # One calculator holding a parameter array per combination: a single vectorized pass
+    calculator = SolarROICalculator(**params)
+    results = calculator.calculate_roi_batch(avg_solar_irradiance, system_size_kw, electricity_rate, years)
+
+    df = pd.DataFrame({
+        'Panel': panels['name'].to_numpy()[p],
+        'Inverter': inverters['name'].to_numpy()[i],
+        'Mounting': mountings['name'].to_numpy()[m],
+        'Performance Ratio': params['performance_ratio'],
+        'Array Area (m²)': calculator.array_area_m2(system_size_kw),
+        'Annual Production (kWh)': results['annual_production_kwh'],
+        'Total Investment ($)': results['total_investment'],
+        'Net Profit ($)': results['net_profit'],
+        'ROI (%)': results['roi_percent'],
+        'Payback (years)': results['payback_period_years'],
+    })
+    df.insert(0, 'Rank', df['ROI (%)'].rank(ascending=False, method='min').astype(int))
+    return df.sort_values('Rank', kind='stable').reset_index(drop=True)
+
+
+# Test the equipment evaluation
+if __name__ == "__main__":
+    import time
+
+    print("Testing equipment evaluation...")
+    start = time.perf_counter()
+    df = evaluate_equipment(5.5, 100, 0.12)
+    print(f"✅ Evaluated {len(df)} combinations in {(time.perf_counter() - start) * 1000:.2f} ms")
+    print(df.head(5).to_string(index=False))
+
+    rng = np.random.default_rng(0)
+    panels = [dict(PANELS[k % len(PANELS)], name=f"Panel {k}", efficiency=rng.uniform(0.16, 0.24)) for k in range(20)]
+    start = time.perf_counter()
+    df = evaluate_equipment(5.5, 100, 0.12, panels=panels, inverters=INVERTERS * 2, mountings=MOUNTINGS * 2)
+    print(f"✅ Evaluated {len(df)} combinations in {(time.perf_counter() - start) * 1000:.2f} ms")
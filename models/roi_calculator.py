@@ -1,10 +1,26 @@
+import numpy as np
+
+from models.payback import payback_years
+from models.tariff import effective_rates, hourly_production_profile
+
+STC_IRRADIANCE_KW_M2 = 1.0  # module ratings are at 1 kW/m²
+
+
 class SolarROICalculator:
-    def __init__(self):
-        # Industry standard values
-        self.panel_efficiency = 0.20  # 20%
-        self.performance_ratio = 0.75  # Accounts for losses
-        self.system_cost_per_kw = 1000  # USD
-        self.degradation_rate = 0.005  # 0.5% per year
+    def __init__(self, panel_efficiency=0.20, performance_ratio=0.75, system_cost_per_kw=1000, degradation_rate=0.005,
+                 discount_rate=0.06):
+        # Industry standard values by default; see models/equipment.py for
+        # values derived from specific panels, inverters and mounting types.
+        # calculate_roi_batch also accepts arrays here, one value per scenario.
+        self.panel_efficiency = panel_efficiency  # 20%
+        self.performance_ratio = performance_ratio  # Accounts for losses
+        self.system_cost_per_kw = system_cost_per_kw  # USD
+        self.degradation_rate = degradation_rate  # 0.5% per year
+        self.discount_rate = discount_rate  # 6% per year, for discounted payback
+
+    def array_area_m2(self, system_size_kw):
+        """Panel area needed for a system size, from the panel efficiency at STC"""
+        return system_size_kw / (self.panel_efficiency * STC_IRRADIANCE_KW_M2)
         
     def calculate_roi(self, avg_solar_irradiance, system_size_kw, electricity_rate=0.12, years=25):
         """
@@ -16,7 +32,9 @@ class SolarROICalculator:
         - electricity_rate: Cost per kWh in USD
         - years: Investment period (default 25 years)
         
-        Returns: Dictionary with financial metrics
+        Returns: Dictionary with financial metrics. Payback periods are the
+        exact break-even years of the degraded cash flow, inf if the system
+        doesn't pay back within the investment period.
         """
         # Annual energy production
         annual_kwh = (
@@ -38,7 +56,10 @@ class SolarROICalculator:
         
         # Calculate metrics
         roi_percent = ((total_revenue - capex) / capex) * 100
-        payback_period = capex / (annual_kwh * electricity_rate)
+        payback_period = float(payback_years(capex, annual_kwh * electricity_rate, self.degradation_rate, 0.0, years))
+        discounted_payback = float(payback_years(
+            capex, annual_kwh * electricity_rate, self.degradation_rate, self.discount_rate, years
+        ))
         
         return {
             'annual_production_kwh': annual_kwh,
@@ -46,8 +67,103 @@ class SolarROICalculator:
             'total_revenue_25y': total_revenue,
             'net_profit': total_revenue - capex,
             'roi_percent': roi_percent,
-            'payback_period_years': payback_period
+            'payback_period_years': payback_period,
+            'discounted_payback_years': discounted_payback
+        }
+
+    def calculate_roi_with_tariff(self, daily_irradiance, latitude, system_size_kw, tariff, load_profile=None, years=25):
+        """
+        Calculate ROI with a structured tariff instead of a flat electricity rate
+        
+        Parameters:
+        - daily_irradiance: Daily solar irradiance for one year (kWh/m²/day)
+        - latitude: Site latitude, used to shape the hourly production profile
+        - system_size_kw: System size in kilowatts
+        - tariff: Tariff definition (see models/tariff.py)
+        - load_profile: Optional hourly site load (8760 kWh values) for
+          self-consumption, export credits and demand charges
+        - years: Investment period (default 25 years)
+        
+        Returns: Dictionary with the calculate_roi metrics plus 'effective_rate',
+        the tariff's average value per kWh produced
+        """
+        production = hourly_production_profile(daily_irradiance, latitude, system_size_kw, self.performance_ratio)
+        effective_rate = float(effective_rates(production, [tariff], load_profile)[0])
+        
+        results = self.calculate_roi(float(np.mean(daily_irradiance)), system_size_kw, effective_rate, years)
+        results['effective_rate'] = effective_rate
+        return results
+
+    def calculate_roi_batch(self, avg_solar_irradiance, system_size_kw, electricity_rate=0.12, years=25):
+        """
+        Vectorized calculate_roi for many sites or scenarios at once
+        
+        Parameters:
+        - avg_solar_irradiance: Array of average daily irradiance values (kWh/m²/day)
+        - system_size_kw: System size in kilowatts (scalar or array)
+        - electricity_rate: Cost per kWh in USD (scalar or array)
+        - years: Investment period (default 25 years)
+        
+        Returns: Dictionary of numpy arrays with the same keys as calculate_roi
+        """
+        avg_solar_irradiance = np.asarray(avg_solar_irradiance, dtype=float)
+        system_size_kw = np.asarray(system_size_kw, dtype=float)
+        electricity_rate = np.asarray(electricity_rate, dtype=float)
+        
+        degradation_rate = np.asarray(self.degradation_rate, dtype=float)
+        annual_kwh = system_size_kw * avg_solar_irradiance * 365 * np.asarray(self.performance_ratio, dtype=float)
+        capex = system_size_kw * np.asarray(self.system_cost_per_kw, dtype=float)
+        shape = np.broadcast_shapes(annual_kwh.shape, capex.shape, electricity_rate.shape, degradation_rate.shape)
+        annual_kwh = np.broadcast_to(annual_kwh, shape).astype(float)
+        capex = np.broadcast_to(capex, shape).astype(float)
+        
+        # Sum of (1 - degradation)^year over the investment period
+        degradation_factor = ((1 - degradation_rate)[..., None] ** np.arange(1, years + 1)).sum(axis=-1)
+        total_revenue = annual_kwh * electricity_rate * degradation_factor
+        
+        annual_cash_flow = annual_kwh * electricity_rate
+        payback_period = payback_years(capex, annual_cash_flow, degradation_rate, 0.0, years)
+        discounted_payback = payback_years(capex, annual_cash_flow, degradation_rate, self.discount_rate, years)
+        
+        return {
+            'annual_production_kwh': annual_kwh,
+            'total_investment': capex,
+            'total_revenue_25y': total_revenue,
+            'net_profit': total_revenue - capex,
+            'roi_percent': (total_revenue - capex) / capex * 100,
+            'payback_period_years': payback_period,
+            'discounted_payback_years': discounted_payback
+        }
+
+    def cash_flow_projection(self, annual_kwh, capex, electricity_rate=0.12, years=25):
+        """
+        Year-by-year cash flow for a solar installation
+        
+        Parameters:
+        - annual_kwh: First-year energy production (kWh), before degradation
+        - capex: Total investment in USD
+        - electricity_rate: Cost per kWh in USD
+        - years: Investment period (default 25 years)
+        
+        Returns: Dictionary of equal-length lists, starting at year 0 (the investment)
+        """
+        projection = {
+            'year': [0],
+            'production_kwh': [0.0],
+            'revenue': [0.0],
+            'cumulative_cash_flow': [-capex]
         }
+        cash = -capex
+        for year in range(1, years + 1):
+            year_production = annual_kwh * ((1 - self.degradation_rate) ** year)
+            year_revenue = year_production * electricity_rate
+            cash += year_revenue
+            projection['year'].append(year)
+            projection['production_kwh'].append(year_production)
+            projection['revenue'].append(year_revenue)
+            projection['cumulative_cash_flow'].append(cash)
+        
+        return projection
 
 # Test the calculator
 if __name__ == "__main__":
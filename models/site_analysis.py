@@ -0,0 +1,97 @@
+import pandas as pd
+
+from data.presets import ANALYSIS_END_DATE, ANALYSIS_START_DATE
+from data.solar_data import get_solar_data
+from data.tmy import WEATHER_ACTUAL, weather_series
+from models.roi_calculator import SolarROICalculator
+from models.tariff import TARIFFS, effective_rates, hourly_load_profile, hourly_production_profile
+
+
+def tariff_by_name(name):
+    """Tariff definition with the given name, or None for a flat rate"""
+    return next((tariff for tariff in TARIFFS if tariff['name'] == name), None)
+
+
+def site_load(load_shape, annual_load_kwh):
+    """Hourly site load, or None when no load is given"""
+    if load_shape is None or not annual_load_kwh:
+        return None
+    return hourly_load_profile(annual_load_kwh, load_shape)
+
+
+def compare_tariffs(solar_df, latitude, system_size_kw, load_shape=None, annual_load_kwh=None, calculator=None):
+    """
+    One site's production valued under every tariff in models.tariff.TARIFFS
+
+    Returns: DataFrame with Tariff, Effective Rate ($/kWh), First-Year Value ($),
+    ROI (%) and Payback (years), best ROI first
+    """
+    calculator = calculator or SolarROICalculator()
+    production = hourly_production_profile(
+        solar_df['solar_irradiance'].to_numpy(), latitude, system_size_kw, calculator.performance_ratio
+    )
+    rates = effective_rates(production, TARIFFS, site_load(load_shape, annual_load_kwh))
+    results = calculator.calculate_roi_batch(solar_df['solar_irradiance'].mean(), system_size_kw, rates)
+    return pd.DataFrame({
+        'Tariff': [tariff['name'] for tariff in TARIFFS],
+        'Effective Rate ($/kWh)': rates,
+        'First-Year Value ($)': rates * results['annual_production_kwh'],
+        'ROI (%)': results['roi_percent'],
+        'Payback (years)': results['payback_period_years'],
+    }).sort_values('ROI (%)', ascending=False)
+
+
+def analyze_site(latitude, longitude, system_size_kw, electricity_rate=0.12, tariff_name=None,
+                 weather=WEATHER_ACTUAL, load_shape=None, annual_load_kwh=None, refresh=False,
+                 start_date=ANALYSIS_START_DATE, end_date=ANALYSIS_END_DATE):
+    """
+    Fetch irradiance and run the ROI analysis for one site
+
+    Parameters:
+    - latitude, longitude: Site coordinates
+    - system_size_kw: System size in kilowatts
+    - electricity_rate: Flat cost per kWh in USD (ignored when a tariff is given)
+    - tariff_name: Name of a tariff in models.tariff.TARIFFS, or None for the flat rate
+    - weather: WEATHER_ACTUAL for the analysis period, or a TMY-based basis
+      from data.tmy (typical year, P50, P90)
+    - load_shape, annual_load_kwh: Site load (a models.tariff.LOAD_SHAPES name
+      and yearly kWh) for valuing self-consumption, exports and demand
+      charges under a tariff; without it all production offsets imports
+    - refresh: Re-fetch irradiance instead of using cached data
+
+    Returns: Dictionary with solar_df, avg_irradiance, results, effective_rate
+    and projection, or None if the data could not be fetched
+    """
+    if weather == WEATHER_ACTUAL:
+        solar_df = get_solar_data(latitude, longitude, start_date, end_date, refresh=refresh)
+    else:
+        solar_df = weather_series(latitude, longitude, weather)
+    if solar_df is None:
+        return None
+
+    avg_irradiance = solar_df['solar_irradiance'].mean()
+    calculator = SolarROICalculator()
+    tariff = tariff_by_name(tariff_name)
+    if tariff is None:
+        results = calculator.calculate_roi(avg_irradiance, system_size_kw, electricity_rate)
+    else:
+        results = calculator.calculate_roi_with_tariff(
+            solar_df['solar_irradiance'].to_numpy(), latitude, system_size_kw, tariff,
+            site_load(load_shape, annual_load_kwh)
+        )
+
+    # Tariff analyses value production at the tariff's effective rate
+    effective_rate = results.get('effective_rate', electricity_rate)
+    projection = calculator.cash_flow_projection(
+        results['annual_production_kwh'],
+        results['total_investment'],
+        effective_rate
+    )
+
+    return {
+        'solar_df': solar_df,
+        'avg_irradiance': avg_irradiance,
+        'results': results,
+        'effective_rate': effective_rate,
+        'projection': projection,
+    }
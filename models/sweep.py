@@ -0,0 +1,197 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from models.roi_calculator import SolarROICalculator
+from models.tariff import effective_rates, hourly_production_profile
+
+SWEEP_WORKERS = int(os.environ.get('SWEEP_WORKERS', os.cpu_count() or 1))
+SWEEP_SHARD_SITES = 32  # sites per task; small enough to balance, large enough to vectorize
+# Shared arrays live here; /dev/shm keeps them in memory on Linux. Sweeps
+# that don't fit there (e.g. Docker's 64 MB default) use the temp directory.
+SWEEP_SHARED_DIR = os.environ.get('SWEEP_SHARED_DIR', '/dev/shm' if os.path.isdir('/dev/shm') else None)
+SWEEP_SPACE_MARGIN = 1.1  # headroom over the exact array sizes when checking free space
+
+# Result arrays filled by a sweep, each shaped (sites, sizes, prices, costs)
+SWEEP_METRICS = (
+    'annual_production_kwh',
+    'net_profit',
+    'roi_percent',
+    'payback_period_years',
+    'discounted_payback_years',
+)
+
+
+def _shard_results(inputs, start, stop):
+    # Sweep sites start..stop, writing into the shared result arrays in place
+    irradiance = np.load(inputs['irradiance'], mmap_mode='r')[start:stop]
+    latitudes = np.load(inputs['latitudes'], mmap_mode='r')[start:stop]
+    sizes = np.asarray(inputs['sizes'], dtype=float)
+    costs = np.asarray(inputs['costs'], dtype=float)
+    tariffs = inputs['tariffs']
+
+    # Price axis: flat rates first, then each tariff's effective rate for the site.
+    # Without a load profile the effective rate doesn't depend on system size.
+    rates = np.empty((stop - start, len(inputs['rates']) + len(tariffs)))
+    rates[:, :len(inputs['rates'])] = inputs['rates']
+    if tariffs:
+        for row, (daily, latitude) in enumerate(zip(irradiance, latitudes)):
+            production = hourly_production_profile(daily, latitude, 1.0, inputs['performance_ratio'])
+            rates[row, len(inputs['rates']):] = effective_rates(production, tariffs)
+
+    calculator = SolarROICalculator(
+        performance_ratio=inputs['performance_ratio'],
+        system_cost_per_kw=costs[None, None, None, :],
+        degradation_rate=inputs['degradation_rate'],
+        discount_rate=inputs['discount_rate'],
+    )
+    results = calculator.calculate_roi_batch(
+        irradiance.mean(axis=1)[:, None, None, None],
+        sizes[None, :, None, None],
+        rates[:, None, :, None],
+        inputs['years'],
+    )
+
+    for metric in SWEEP_METRICS:
+        out = np.lib.format.open_memmap(inputs['outputs'][metric], mode='r+')
+        out[start:stop] = results[metric]
+        out.flush()
+        del out
+    return stop - start
+
+
+def _shared_dir(required_bytes):
+    # Writing a memory-mapped file past a full filesystem kills the process
+    # with SIGBUS, so free space is checked before anything is mapped
+    required_bytes *= SWEEP_SPACE_MARGIN
+    for directory in (SWEEP_SHARED_DIR, tempfile.gettempdir()):
+        if directory and os.path.isdir(directory) and shutil.disk_usage(directory).free >= required_bytes:
+            return directory
+    raise OSError(f"Not enough free space for a {required_bytes / 2**20:,.0f} MB sweep in "
+                  f"{SWEEP_SHARED_DIR} or {tempfile.gettempdir()}")
+
+
+def _share(directory, name, array):
+    path = os.path.join(directory, f"{name}.npy")
+    np.save(path, np.ascontiguousarray(array))
+    return path
+
+
+def run_sweep(irradiance, latitudes, system_sizes_kw, electricity_rates=(), tariffs=(), system_costs_per_kw=(1000,),
+              performance_ratio=0.75, degradation_rate=0.005, discount_rate=0.06, years=25,
+              max_workers=None, shard_sites=SWEEP_SHARD_SITES):
+    """
+    ROI for every combination of site, system size, price and system cost
+
+    The irradiance matrix and the result arrays are memory-mapped files
+    (under /dev/shm where available and large enough, else the temp
+    directory) shared by every worker: nothing is pickled per task except
+    the site range, and each worker writes its shard of the results in
+    place. Sites are sharded across a spawn process pool; a single worker
+    runs in-process. Raises OSError if neither location has room.
+
+    Parameters:
+    - irradiance: Daily irradiance per site, shape (sites, days) in kWh/m²/day
+    - latitudes: Site latitudes, shape (sites,), for tariff production profiles
+    - system_sizes_kw: System sizes in kilowatts
+    - electricity_rates: Flat rates in $/kWh
+    - tariffs: Tariff definitions (see models/tariff.py), valued per site
+    - system_costs_per_kw: Installed cost assumptions in USD/kW
+    - performance_ratio, degradation_rate, discount_rate, years: As in SolarROICalculator
+    - max_workers: Worker processes (default SWEEP_WORKERS)
+    - shard_sites: Sites per task
+
+    Returns: Dictionary with one array per SWEEP_METRICS entry, shaped
+    (sites, sizes, prices, costs) where the price axis lists the flat rates
+    followed by the tariffs, plus 'prices' with their labels
+    """
+    irradiance = np.asarray(irradiance, dtype=float)
+    latitudes = np.broadcast_to(np.asarray(latitudes, dtype=float), irradiance.shape[:1])
+    sizes = np.atleast_1d(np.asarray(system_sizes_kw, dtype=float))
+    rates = np.atleast_1d(np.asarray(electricity_rates, dtype=float))
+    costs = np.atleast_1d(np.asarray(system_costs_per_kw, dtype=float))
+    tariffs = list(tariffs)
+    n_sites = irradiance.shape[0]
+    shape = (n_sites, len(sizes), len(rates) + len(tariffs), len(costs))
+    prices = [f"${rate:.2f}/kWh" for rate in rates] + [tariff['name'] for tariff in tariffs]
+    if not all(shape):
+        return {**{metric: np.empty(shape) for metric in SWEEP_METRICS}, 'prices': prices}
+
+    required_bytes = irradiance.nbytes + latitudes.nbytes + len(SWEEP_METRICS) * np.prod(shape) * 8
+    directory = tempfile.mkdtemp(prefix='solar-sweep-', dir=_shared_dir(required_bytes))
+    try:
+        inputs = {
+            'irradiance': _share(directory, 'irradiance', irradiance),
+            'latitudes': _share(directory, 'latitudes', latitudes),
+            'sizes': sizes,
+            'rates': rates,
+            'costs': costs,
+            'tariffs': tariffs,
+            'performance_ratio': performance_ratio,
+            'degradation_rate': degradation_rate,
+            'discount_rate': discount_rate,
+            'years': years,
+            'outputs': {},
+        }
+        for metric in SWEEP_METRICS:
+            path = os.path.join(directory, f"{metric}.npy")
+            np.lib.format.open_memmap(path, mode='w+', shape=shape).flush()
+            inputs['outputs'][metric] = path
+
+        shards = [(start, min(start + shard_sites, n_sites)) for start in range(0, n_sites, shard_sites)]
+        workers = min(max_workers or SWEEP_WORKERS, len(shards))
+        if workers <= 1:
+            for start, stop in shards:
+                _shard_results(inputs, start, stop)
+        else:
+            # spawn: forking a parent with live BLAS/OpenMP thread pools can deadlock the
+            # children, and workers only need file paths, so fresh interpreters cost little
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+                futures = [pool.submit(_shard_results, inputs, start, stop) for start, stop in shards]
+                for future in futures:
+                    future.result()
+
+        # The mappings stay valid after the files are removed below
+        results = {
+            metric: np.load(inputs['outputs'][metric], mmap_mode='c')
+            for metric in SWEEP_METRICS
+        }
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    results['prices'] = prices
+    return results
+
+
+# Test the sweep
+if __name__ == "__main__":
+    import time
+
+    from models.tariff import TARIFFS
+
+    print("Testing scenario sweep...")
+    rng = np.random.default_rng(0)
+    n_sites = 2000
+    seasonal = 5 + 2 * np.sin(2 * np.pi * (np.arange(365) - 80) / 365)
+    irradiance = np.clip(seasonal + rng.normal(0, 1, (n_sites, 365)), 0, None)
+    latitudes = rng.uniform(-60, 60, n_sites)
+    sizes = np.linspace(10, 1000, 20)
+    rates = np.linspace(0.05, 0.30, 10)
+    costs = np.linspace(700, 1500, 9)
+
+    for workers in sorted({1, SWEEP_WORKERS}):
+        start = time.perf_counter()
+        results = run_sweep(irradiance, latitudes, sizes, rates, TARIFFS, costs, max_workers=workers)
+        elapsed = time.perf_counter() - start
+        scenarios = results['roi_percent'].size
+        print(f"✅ {workers} worker(s): {scenarios:,} scenarios in {elapsed:.2f} s "
+              f"({scenarios / elapsed / 1e6:.1f} M/s)")
+
+    calc = SolarROICalculator(system_cost_per_kw=costs[3])
+    expected = calc.calculate_roi(irradiance[7].mean(), sizes[4], rates[2])
+    assert np.isclose(results['roi_percent'][7, 4, 2, 3], expected['roi_percent'])
+    print("✅ Matches SolarROICalculator")
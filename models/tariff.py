@@ -0,0 +1,263 @@
+import json
+import threading
+
+import numpy as np
+
+HOURS_PER_YEAR = 8760
+CALENDAR_YEAR = 2025  # non-leap year used to lay out weekdays in the price vectors
+MATRIX_CACHE_SIZE = 64  # distinct tariff sets kept as stacked price matrices
+
+# Tariff definitions
+# - energy_rate: import price in $/kWh outside any period
+# - periods: list of {'rate', 'months', 'hours', 'weekdays_only'}; later periods
+#   override earlier ones. Missing months/hours mean "all".
+# - export_rate: $/kWh credited for exported energy; None means full net metering
+#   (exports credited at the import price)
+# - demand_charge: $/kW of monthly peak demand (scalar, or 12 monthly values)
+TARIFFS = [
+    {
+        'name': 'Flat Rate',
+        'energy_rate': 0.12,
+    },
+    {
+        'name': 'Residential TOU',
+        'energy_rate': 0.10,
+        'periods': [
+            {'rate': 0.32, 'hours': list(range(16, 21)), 'weekdays_only': True},
+        ],
+    },
+    {
+        'name': 'Residential TOU + Net Billing',
+        'energy_rate': 0.10,
+        'periods': [
+            {'rate': 0.32, 'hours': list(range(16, 21)), 'weekdays_only': True},
+        ],
+        'export_rate': 0.05,
+    },
+    {
+        'name': 'Commercial Seasonal TOU + Demand',
+        'energy_rate': 0.08,
+        'periods': [
+            {'rate': 0.11, 'months': [6, 7, 8, 9], 'hours': list(range(8, 22))},
+            {'rate': 0.19, 'months': [6, 7, 8, 9], 'hours': list(range(12, 18)), 'weekdays_only': True},
+        ],
+        'export_rate': 0.03,
+        'demand_charge': 14.0,
+    },
+    {
+        'name': 'Solar Midday Discount',
+        'energy_rate': 0.14,
+        'periods': [
+            {'rate': 0.07, 'hours': list(range(10, 15))},
+            {'rate': 0.24, 'hours': list(range(17, 21))},
+        ],
+        'export_rate': 0.02,
+    },
+]
+
+# Typical site load shapes: relative consumption per hour of day, weekend
+# factor, and relative consumption per month (January first)
+LOAD_SHAPES = {
+    'Commercial': {
+        'hours': [0.3] * 6 + [0.5, 0.8, 1.0, 1.1, 1.2, 1.2, 1.2, 1.2, 1.2, 1.1, 1.0, 0.8, 0.6, 0.5, 0.4, 0.3, 0.3, 0.3],
+        'weekend': 0.4,
+        'months': [0.9, 0.9, 0.9, 0.9, 1.0, 1.1, 1.2, 1.2, 1.1, 1.0, 0.9, 0.9],
+    },
+    'Residential': {
+        'hours': [0.5, 0.4, 0.4, 0.4, 0.4, 0.5, 0.8, 1.0, 0.9, 0.7, 0.6, 0.6,
+                  0.6, 0.6, 0.7, 0.8, 1.0, 1.3, 1.5, 1.5, 1.3, 1.1, 0.8, 0.6],
+        'weekend': 1.1,
+        'months': [1.1, 1.0, 0.9, 0.8, 0.9, 1.1, 1.3, 1.3, 1.1, 0.9, 0.9, 1.1],
+    },
+}
+
+_matrix_cache = {}
+_matrix_lock = threading.Lock()
+
+
+def _calendar():
+    days = np.arange(f'{CALENDAR_YEAR}-01-01', f'{CALENDAR_YEAR + 1}-01-01', dtype='datetime64[D]')
+    month = days.astype('datetime64[M]').astype(int) % 12 + 1
+    weekday = (days.astype(int) + 3) % 7  # 1970-01-01 was a Thursday; Monday is 0
+    return (
+        np.repeat(month, 24),
+        np.repeat(weekday, 24),
+        np.tile(np.arange(24), len(days)),
+    )
+
+
+HOUR_MONTH, HOUR_WEEKDAY, HOUR_OF_DAY = _calendar()
+_MONTH_STARTS = np.flatnonzero(np.r_[True, np.diff(HOUR_MONTH) != 0])
+
+
+def _tariff_key(tariff):
+    return json.dumps(tariff, sort_keys=True, default=list)
+
+
+def price_vectors(tariff):
+    """
+    Hour-of-year prices for one tariff
+
+    Returns: (import_prices, export_prices, monthly_demand_charges) with
+    shapes (8760,), (8760,) and (12,)
+    """
+    import_prices = np.full(HOURS_PER_YEAR, float(tariff['energy_rate']))
+    for period in tariff.get('periods', []):
+        mask = np.ones(HOURS_PER_YEAR, dtype=bool)
+        if period.get('months') is not None:
+            mask &= np.isin(HOUR_MONTH, list(period['months']))
+        if period.get('hours') is not None:
+            mask &= np.isin(HOUR_OF_DAY, list(period['hours']))
+        if period.get('weekdays_only'):
+            mask &= HOUR_WEEKDAY < 5
+        import_prices[mask] = period['rate']
+
+    export_rate = tariff.get('export_rate')
+    export_prices = import_prices.copy() if export_rate is None else np.full(HOURS_PER_YEAR, float(export_rate))
+    demand_charges = np.broadcast_to(np.asarray(tariff.get('demand_charge', 0.0), dtype=float), (12,)).copy()
+    return import_prices, export_prices, demand_charges
+
+
+def tariff_matrices(tariffs):
+    """
+    Stacked price vectors for a list of tariffs, cached per tariff set
+
+    Returns: (import_matrix, export_matrix, demand_matrix) with shapes
+    (T, 8760), (T, 8760) and (T, 12)
+    """
+    key = tuple(_tariff_key(tariff) for tariff in tariffs)
+    with _matrix_lock:
+        if key in _matrix_cache:
+            return _matrix_cache[key]
+
+    vectors = [price_vectors(tariff) for tariff in tariffs]
+    matrices = tuple(np.vstack(parts) for parts in zip(*vectors))
+    for matrix in matrices:
+        matrix.flags.writeable = False
+
+    with _matrix_lock:
+        if len(_matrix_cache) >= MATRIX_CACHE_SIZE:
+            _matrix_cache.clear()
+        _matrix_cache[key] = matrices
+    return matrices
+
+
+def _to_365_days(daily_values):
+    daily_values = np.asarray(daily_values, dtype=float)
+    if len(daily_values) == 366:
+        return np.delete(daily_values, 59)  # Feb 29
+    if len(daily_values) == 365:
+        return daily_values
+    # Partial or irregular series: stretch onto a 365-day year
+    positions = np.linspace(0, len(daily_values) - 1, 365)
+    return np.interp(positions, np.arange(len(daily_values)), daily_values)
+
+
+def hourly_production_profile(daily_irradiance, latitude, system_size_kw, performance_ratio=0.75):
+    """
+    Spread daily production over the hours of the day
+
+    Each day's energy (system size x irradiance x performance ratio) follows a
+    half-sine between sunrise and sunset, with day length from the latitude
+    and solar declination.
+
+    Parameters:
+    - daily_irradiance: Daily irradiance for one year (kWh/m²/day)
+    - latitude: Site latitude in degrees
+    - system_size_kw: System size in kilowatts
+    - performance_ratio: System losses factor
+
+    Returns: Array of 8760 hourly production values in kWh
+    """
+    daily_kwh = system_size_kw * _to_365_days(daily_irradiance) * performance_ratio
+
+    day_of_year = np.arange(1, 366)
+    declination = np.radians(23.44) * np.sin(2 * np.pi * (284 + day_of_year) / 365)
+    cos_sunset = np.clip(-np.tan(np.radians(latitude)) * np.tan(declination), -1, 1)
+    day_length = 2 * np.degrees(np.arccos(cos_sunset)) / 15  # hours
+    sunrise = 12 - day_length / 2
+
+    hour_centers = np.arange(24) + 0.5
+    with np.errstate(divide='ignore', invalid='ignore'):
+        phase = (hour_centers[None, :] - sunrise[:, None]) / day_length[:, None]
+    shape = np.where((phase > 0) & (phase < 1), np.sin(np.pi * phase), 0.0)
+    totals = shape.sum(axis=1, keepdims=True)
+    shape = np.divide(shape, totals, out=np.zeros_like(shape), where=totals > 0)
+
+    return (daily_kwh[:, None] * shape).ravel()
+
+
+def hourly_load_profile(annual_kwh, shape='Commercial'):
+    """
+    Hourly site load from an annual consumption and a typical shape
+
+    Parameters:
+    - annual_kwh: Yearly site consumption in kWh
+    - shape: Name of a shape in LOAD_SHAPES
+
+    Returns: Array of 8760 hourly load values in kWh
+    """
+    spec = LOAD_SHAPES[shape]
+    weights = (
+        np.asarray(spec['hours'])[HOUR_OF_DAY] *
+        np.asarray(spec['months'])[HOUR_MONTH - 1] *
+        np.where(HOUR_WEEKDAY >= 5, spec['weekend'], 1.0)
+    )
+    return float(annual_kwh) * weights / weights.sum()
+
+
+def value_production(production, tariffs, load=None):
+    """
+    First-year value of a production profile under many tariffs at once
+
+    Parameters:
+    - production: Hourly production (8760 kWh values)
+    - tariffs: List of tariff definitions
+    - load: Optional hourly site load (8760 kWh values). Without it, all
+      production offsets imports (net metering at the import price).
+
+    Returns: Array with one annual value in USD per tariff
+    """
+    production = np.asarray(production, dtype=float)
+    import_matrix, export_matrix, demand_matrix = tariff_matrices(tariffs)
+
+    if load is None:
+        return import_matrix @ production
+
+    load = np.asarray(load, dtype=float)
+    self_consumed = np.minimum(production, load)
+    exported = production - self_consumed
+
+    # Reduction of each month's peak demand (hourly kWh ~ average kW)
+    net_load = load - self_consumed
+    peak_reduction = (
+        np.maximum.reduceat(load, _MONTH_STARTS) -
+        np.maximum.reduceat(net_load, _MONTH_STARTS)
+    )
+
+    return import_matrix @ self_consumed + export_matrix @ exported + demand_matrix @ peak_reduction
+
+
+def effective_rates(production, tariffs, load=None):
+    """Average value in $/kWh of the production under each tariff"""
+    total = np.asarray(production, dtype=float).sum()
+    values = value_production(production, tariffs, load)
+    return values / total if total > 0 else np.zeros_like(values)
+
+
+# Test the tariff engine
+if __name__ == "__main__":
+    import time
+
+    print("Testing tariff engine...")
+    daily = 5.5 + 2 * np.sin(2 * np.pi * (np.arange(365) - 80) / 365)
+    production = hourly_production_profile(daily, 33.45, 100)
+    load = hourly_load_profile(150_000)
+    for tariff, rate in zip(TARIFFS, effective_rates(production, TARIFFS, load)):
+        print(f"✅ {tariff['name']}: ${rate:.3f}/kWh")
+
+    many = [dict(TARIFFS[k % len(TARIFFS)], name=f"Tariff {k}", energy_rate=0.05 + k / 1000) for k in range(48)]
+    tariff_matrices(many)
+    start = time.perf_counter()
+    value_production(production, many, load)
+    print(f"✅ Valued {len(many)} tariffs in {(time.perf_counter() - start) * 1000:.2f} ms")
@@ -1,7 +1,11 @@
 import streamlit as st
-from PIL import Image, ImageDraw
-import io
-import base64
+import sys
+import os
+
+# Add the app directory to path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.assets import AVATAR_SIZE, avatar_data_uri
 
 st.set_page_config(
     page_title="About - Solar ROI Predictor",
@@ -146,31 +150,18 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Team Members
-# Function to create circular image
-def create_circular_image(image_path, size=120):
-    img = Image.open(image_path)
-    img = img.resize((size, size))
-    mask = Image.new('L', (size, size), 0)
-    draw = ImageDraw.Draw(mask)
-    draw.ellipse((0, 0, size, size), fill=255)
-    output = Image.new('RGBA', (size, size), (0, 0, 0, 0))
-    output.paste(img, (0, 0))
-    output.putalpha(mask)
-    buffered = io.BytesIO()
-    output.save(buffered, format="PNG")
-    return base64.b64encode(buffered.getvalue()).decode()
-
-# Create circular images for all team members
-sheeraz_img = create_circular_image("assets/sheeraz.png")
-sonia_img = create_circular_image("assets/sonia.png")
-waqad_img = create_circular_image("assets/waqad.png")
+# Circular avatars are pre-rendered at display size (python -m utils.assets)
+# and served from a process-wide store
+sheeraz_img = avatar_data_uri("sheeraz")
+sonia_img = avatar_data_uri("sonia")
+waqad_img = avatar_data_uri("waqad")
 
 col1, col2, col3 = st.columns(3)
 
 with col1:
     st.markdown(f"""
     <div class="team-member">
-        <img src="data:image/png;base64,{sheeraz_img}" class="profile-img" alt="Muhammad Sheeraz">
+        <img src="{sheeraz_img}" class="profile-img" width="{AVATAR_SIZE}" height="{AVATAR_SIZE}" alt="Muhammad Sheeraz">
         <div class="member-name">Muhammad Sheeraz</div>
         <div class="member-role">ML Engineer & Full-Stack Developer</div>
         <div class="member-bio">
@@ -182,7 +173,7 @@ with col1:
 with col2:
     st.markdown(f"""
     <div class="team-member">
-        <img src="data:image/png;base64,{sonia_img}" class="profile-img" alt="Sonia Irfan">
+        <img src="{sonia_img}" class="profile-img" width="{AVATAR_SIZE}" height="{AVATAR_SIZE}" alt="Sonia Irfan">
         <div class="member-name">Sonia Irfan</div>
         <div class="member-role">Financial Analytics Expert</div>
         <div class="member-bio">
@@ -194,7 +185,7 @@ with col2:
 with col3:
     st.markdown(f"""
     <div class="team-member">
-        <img src="data:image/png;base64,{waqad_img}" class="profile-img" alt="Waqad">
+        <img src="{waqad_img}" class="profile-img" width="{AVATAR_SIZE}" height="{AVATAR_SIZE}" alt="Waqad">
         <div class="member-name">Waqad</div>
         <div class="member-role">Mobile App Developer</div>
         <div class="member-bio">
@@ -0,0 +1,128 @@
+import base64
+import io
+import os
+import threading
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ASSETS_DIR = os.path.join(ROOT_DIR, 'assets')
+AVATAR_DIR = os.path.join(ASSETS_DIR, 'avatars')
+AVATAR_SIZE = 150  # px, the .profile-img display size on the About page
+AVATAR_SUPERSAMPLE = 4  # the circular mask is drawn this much larger, then downsampled for smooth edges
+AVATAR_QUALITY = 85  # WebP quality
+
+# format -> (file extension, MIME type); WebP first, PNG where Pillow can't encode WebP
+AVATAR_FORMATS = {
+    'webp': ('webp', 'image/webp'),
+    'png': ('png', 'image/png'),
+}
+
+_avatars = {}
+_avatars_lock = threading.Lock()
+
+
+def _source_path(name):
+    return os.path.join(ASSETS_DIR, f"{name}.png")
+
+
+def _avatar_path(name, size, fmt):
+    return os.path.join(AVATAR_DIR, f"{name}_{size}.{AVATAR_FORMATS[fmt][0]}")
+
+
+def _webp_supported():
+    from PIL import features
+    return features.check('webp')
+
+
+def render_avatar(source, size=AVATAR_SIZE, fmt='webp'):
+    """
+    Circular avatar from a photo
+
+    The photo is center-cropped to a square (not stretched), resized to
+    size x size and given an anti-aliased circular alpha mask.
+
+    Returns: Encoded image bytes
+    """
+    from PIL import Image, ImageDraw, ImageOps
+
+    with Image.open(source) as img:
+        img = ImageOps.fit(img.convert('RGB'), (size, size), Image.LANCZOS)
+
+    big = size * AVATAR_SUPERSAMPLE
+    mask = Image.new('L', (big, big), 0)
+    ImageDraw.Draw(mask).ellipse((0, 0, big - 1, big - 1), fill=255)
+    img.putalpha(mask.resize((size, size), Image.LANCZOS))
+
+    buffer = io.BytesIO()
+    if fmt == 'webp':
+        img.save(buffer, format='WEBP', quality=AVATAR_QUALITY, method=6)
+    else:
+        img.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def build_avatars(names=None, size=AVATAR_SIZE, force=False):
+    """
+    Pre-render avatars for the photos in assets/ into assets/avatars/
+
+    Only missing avatars, or those older than their photo, are rendered
+    unless force=True. Returns the paths written.
+    """
+    if names is None:
+        names = sorted(
+            os.path.splitext(entry)[0] for entry in os.listdir(ASSETS_DIR) if entry.endswith('.png')
+        )
+    formats = ['webp', 'png'] if _webp_supported() else ['png']
+
+    os.makedirs(AVATAR_DIR, exist_ok=True)
+    written = []
+    for name in names:
+        source = _source_path(name)
+        for fmt in formats:
+            path = _avatar_path(name, size, fmt)
+            if not force and os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(source):
+                continue
+            data = render_avatar(source, size, fmt)
+            with open(path, 'wb') as f:
+                f.write(data)
+            written.append(path)
+    return written
+
+
+def avatar_data_uri(name, size=AVATAR_SIZE):
+    """
+    Circular avatar for assets/<name>.png as a data: URI
+
+    Served from a process-wide store: the first call per avatar reads the
+    pre-rendered file (rendering it if missing or stale), every later call
+    in any session is a dictionary lookup.
+    """
+    key = (name, size)
+    with _avatars_lock:
+        uri = _avatars.get(key)
+    if uri is not None:
+        return uri
+
+    fmt = 'webp' if os.path.exists(_avatar_path(name, size, 'webp')) or _webp_supported() else 'png'
+    path = _avatar_path(name, size, fmt)
+    source = _source_path(name)
+    try:
+        if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(source):
+            build_avatars([name], size)
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError as e:
+        # Read-only deployments: render in memory instead of from the store
+        print(f"Error reading avatar {path}: {e}")
+        data = render_avatar(source, size, fmt)
+
+    uri = f"data:{AVATAR_FORMATS[fmt][1]};base64,{base64.b64encode(data).decode()}"
+    with _avatars_lock:
+        _avatars[key] = uri
+    return uri
+
+
+# Pre-render the avatars
+if __name__ == "__main__":
+    paths = build_avatars(force=True)
+    for path in paths:
+        print(f"✅ {os.path.relpath(path, ROOT_DIR)} ({os.path.getsize(path):,} bytes)")
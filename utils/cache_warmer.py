@@ -0,0 +1,264 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from data.presets import DEFAULT_ELECTRICITY_RATE, DEFAULT_SYSTEM_SIZE_KW, PRESET_LOCATIONS
+from data.solar_data import CACHE_DIR, SOLAR_DATA_TTL_SECONDS
+from data.tmy import WEATHER_ACTUAL
+from models.site_analysis import analyze_site
+from utils.export import dataframe_fingerprint
+from utils.visualizations import cash_flow_figure
+
+USAGE_LOG_PATH = os.environ.get('SOLAR_USAGE_LOG', os.path.join(CACHE_DIR, 'usage.jsonl'))
+CACHE_WARM_INTERVAL_SECONDS = int(os.environ.get('CACHE_WARM_INTERVAL_SECONDS', 3600))
+CACHE_WARM_TOP_N = int(os.environ.get('CACHE_WARM_TOP_N', 20))
+ANALYSIS_CACHE_SIZE = 256  # finished analyses kept in memory
+ANALYSIS_VIEWS_PER_ENTRY = 32  # derived tables kept with each analysis
+USAGE_LOG_MAX_LINES = 10_000  # past this, the log is compacted to one counted line per site
+USAGE_LOG_MAX_SITES = 1_000  # sites kept when compacting, most requested first
+
+_usage_lock = threading.Lock()
+
+
+def _round_coords(latitude, longitude):
+    return round(float(latitude), 2), round(float(longitude), 2)
+
+
+def record_usage(latitude, longitude, path=USAGE_LOG_PATH):
+    """Append one analysed location to the usage log"""
+    lat, lon = _round_coords(latitude, longitude)
+    line = json.dumps({'ts': int(time.time()), 'lat': lat, 'lon': lon}) + "\n"
+    try:
+        with _usage_lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'a', encoding='utf-8') as log:
+                log.write(line)
+    except OSError as e:
+        print(f"Error writing usage log: {e}")
+
+
+def _compact_usage(counts, path, max_sites=USAGE_LOG_MAX_SITES):
+    # Rewrite the log as one counted line per site, renamed into place
+    lines = [
+        json.dumps({'lat': lat, 'lon': lon, 'count': count}) + "\n"
+        for (lat, lon), count in counts.most_common(max_sites)
+    ]
+    try:
+        with tempfile.NamedTemporaryFile('w', dir=os.path.dirname(path), suffix='.tmp', delete=False,
+                                         encoding='utf-8') as tmp:
+            tmp.writelines(lines)
+        os.replace(tmp.name, path)
+    except OSError as e:
+        print(f"Error compacting usage log: {e}")
+
+
+def top_locations(n=CACHE_WARM_TOP_N, path=USAGE_LOG_PATH, max_lines=USAGE_LOG_MAX_LINES):
+    """
+    Most requested coordinates from the usage log
+
+    Logs longer than max_lines are compacted in place, which keeps the file
+    and this read bounded.
+
+    Returns: List of (latitude, longitude) tuples, most requested first
+    """
+    counts = Counter()
+    lines = 0
+    try:
+        with _usage_lock:
+            with open(path, encoding='utf-8') as log:
+                for line in log:
+                    lines += 1
+                    try:
+                        entry = json.loads(line)
+                        counts[(entry['lat'], entry['lon'])] += entry.get('count', 1)
+                    except (ValueError, KeyError, AttributeError):
+                        continue
+            if lines > max_lines:
+                _compact_usage(counts, path)
+    except FileNotFoundError:
+        return []
+    return [coords for coords, _ in counts.most_common(n)]
+
+
+class CacheWarmer:
+    """
+    Process-wide store of finished site analyses, kept warm in the background
+
+    analysis() serves from the store and computes on a miss; entries expire
+    with the irradiance they were built from (SOLAR_DATA_TTL_SECONDS). A
+    background thread precomputes the preset locations and the most
+    requested sites at startup and every interval, and drops every entry
+    for a site whose irradiance data changed upstream.
+    """
+
+    def __init__(self, presets=PRESET_LOCATIONS, top_n=CACHE_WARM_TOP_N, interval=CACHE_WARM_INTERVAL_SECONDS,
+                 system_size_kw=DEFAULT_SYSTEM_SIZE_KW, electricity_rate=DEFAULT_ELECTRICITY_RATE,
+                 usage_log=USAGE_LOG_PATH):
+        self.presets = presets
+        self.top_n = top_n
+        self.interval = interval
+        self.system_size_kw = system_size_kw
+        self.electricity_rate = electricity_rate
+        self.usage_log = usage_log
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _key(latitude, longitude, system_size_kw, electricity_rate, tariff_name, weather, load_shape=None,
+             annual_load_kwh=None):
+        # The flat rate only matters without a tariff, the site load only with one
+        if tariff_name is None:
+            rate, load = round(float(electricity_rate), 4), None
+        else:
+            rate, load = None, (load_shape, float(annual_load_kwh or 0))
+        return _round_coords(latitude, longitude) + (float(system_size_kw), rate, tariff_name, weather, load)
+
+    def _build(self, latitude, longitude, system_size_kw, electricity_rate, tariff_name, weather, load_shape=None,
+               annual_load_kwh=None, refresh=False):
+        entry = analyze_site(
+            latitude, longitude, system_size_kw, electricity_rate, tariff_name, weather, load_shape,
+            annual_load_kwh, refresh=refresh
+        )
+        if entry is None:
+            return None
+        entry['fingerprint'] = dataframe_fingerprint(entry['solar_df'])
+        entry['cash_flow_figure'] = cash_flow_figure(entry['projection'])
+        entry['built_at'] = time.time()
+        entry['views'] = OrderedDict()
+        return entry
+
+    @staticmethod
+    def _fresh(entry):
+        return entry is not None and time.time() - entry['built_at'] < SOLAR_DATA_TTL_SECONDS
+
+    def _store(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > ANALYSIS_CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+    def analysis(self, latitude, longitude, system_size_kw, electricity_rate, tariff_name=None,
+                 weather=WEATHER_ACTUAL, load_shape=None, annual_load_kwh=None, count_usage=True):
+        """
+        Finished analysis for a site, from the warm store when available
+
+        count_usage records the site in the usage log; callers pass False for
+        reruns of a site they already counted (slider and tariff changes),
+        so one session counts each site once.
+
+        Returns: Dictionary from analyze_site plus 'cash_flow_figure',
+        'fingerprint', 'built_at' and 'views' (see view()), or None if the
+        data could not be fetched
+        """
+        if count_usage:
+            record_usage(latitude, longitude, self.usage_log)
+        key = self._key(
+            latitude, longitude, system_size_kw, electricity_rate, tariff_name, weather, load_shape, annual_load_kwh
+        )
+        with self._lock:
+            entry = self._entries.get(key)
+            if self._fresh(entry):
+                self._entries.move_to_end(key)
+                return entry
+
+        entry = self._build(
+            latitude, longitude, system_size_kw, electricity_rate, tariff_name, weather, load_shape, annual_load_kwh
+        )
+        if entry is not None:
+            self._store(key, entry)
+        return entry
+
+    def view(self, entry, key, build):
+        """
+        A result derived from an analysis, built once and kept with the entry
+
+        Parameters:
+        - entry: Dictionary from analysis()
+        - key: Hashable description of the view and its extra inputs,
+          e.g. ('equipment', ambient_temp_c)
+        - build: Callable returning the view; only called on a miss
+
+        Views are shared by every session and must not be modified.
+        """
+        with self._lock:
+            views = entry['views']
+            if key in views:
+                views.move_to_end(key)
+                return views[key]
+        value = build()
+        with self._lock:
+            views[key] = value
+            while len(views) > ANALYSIS_VIEWS_PER_ENTRY:
+                views.popitem(last=False)
+        return value
+
+    def _targets(self):
+        coords = [(preset['latitude'], preset['longitude']) for preset in self.presets]
+        coords += top_locations(self.top_n, self.usage_log)
+        return list(dict.fromkeys(_round_coords(lat, lon) for lat, lon in coords))
+
+    def warm(self, refresh=False):
+        """
+        Precompute the default analysis for presets and popular sites
+
+        Missing and expired entries are built. With refresh=True,
+        irradiance is re-fetched for every site: where it is unchanged, the
+        site's entries built from the same data are renewed (keeping their
+        views); where it changed, every entry for the site (other sizes,
+        rates, tariffs) is dropped. Returns the number of entries built.
+        """
+        built = 0
+        for lat, lon in self._targets():
+            if self._stop.is_set():
+                break
+            key = self._key(lat, lon, self.system_size_kw, self.electricity_rate, None, WEATHER_ACTUAL)
+            with self._lock:
+                current = self._entries.get(key)
+            if self._fresh(current) and not refresh:
+                continue
+
+            entry = self._build(
+                lat, lon, self.system_size_kw, self.electricity_rate, None, WEATHER_ACTUAL, refresh=refresh
+            )
+            if entry is None:
+                continue
+            if current is not None and current['fingerprint'] == entry['fingerprint']:
+                with self._lock:
+                    for cached in self._entries.values():
+                        if cached['fingerprint'] == current['fingerprint']:
+                            cached['built_at'] = entry['built_at']
+                continue
+            if current is not None:
+                with self._lock:
+                    for stale in [stale for stale in self._entries if stale[:2] == (lat, lon)]:
+                        del self._entries[stale]
+            self._store(key, entry)
+            built += 1
+        return built
+
+    def _run(self):
+        refresh = False
+        while not self._stop.is_set():
+            try:
+                self.warm(refresh=refresh)
+            except Exception as e:
+                print(f"Error warming cache: {e}")
+            refresh = True
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Warm now and then every interval, in a daemon thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='cache-warmer', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the background thread"""
+        self._stop.set()
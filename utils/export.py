@@ -0,0 +1,225 @@
+import hashlib
+import io
+import threading
+import zipfile
+from collections import OrderedDict
+
+import pandas as pd
+
+# format key -> (label, file extension, MIME type)
+EXPORT_FORMATS = {
+    'csv': ('CSV', 'csv', 'text/csv'),
+    'parquet': ('Parquet', 'parquet', 'application/vnd.apache.parquet'),
+    'arrow': ('Arrow IPC', 'arrow', 'application/vnd.apache.arrow.file'),
+    'excel': ('Excel', 'xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+
+CHUNK_ROWS = 50_000  # rows serialized per write, keeps peak memory flat on large frames
+CACHE_MAX_BYTES = 256 * 1024 * 1024  # process-wide budget for finished payloads, all held in memory
+
+_cache = OrderedDict()
+_cache_bytes = 0
+_cache_lock = threading.Lock()
+
+
+def dataframe_fingerprint(df):
+    """
+    Content hash of a DataFrame (values, index, column names and dtypes)
+
+    Two frames with the same contents always get the same fingerprint, so it
+    can be used as a cache key across reruns and sessions.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(list(df.columns)).encode())
+    digest.update(repr([str(dtype) for dtype in df.dtypes]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    return digest.hexdigest()
+
+
+def file_name(stem, fmt):
+    """File name for an export of the given format"""
+    return f"{stem}.{EXPORT_FORMATS[fmt][1]}"
+
+
+def mime_type(fmt):
+    """MIME type for an export of the given format"""
+    return EXPORT_FORMATS[fmt][2]
+
+
+def _cached(key, build):
+    """Return the payload cached under key, building and storing it on a miss"""
+    global _cache_bytes
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    payload = build()
+
+    with _cache_lock:
+        if key not in _cache and len(payload) <= CACHE_MAX_BYTES:
+            _cache[key] = payload
+            _cache_bytes += len(payload)
+            while _cache_bytes > CACHE_MAX_BYTES:
+                _, evicted = _cache.popitem(last=False)
+                _cache_bytes -= len(evicted)
+    return payload
+
+
+def clear_cache():
+    """Drop every cached export payload"""
+    global _cache_bytes
+    with _cache_lock:
+        _cache.clear()
+        _cache_bytes = 0
+
+
+def _chunks(df):
+    for start in range(0, len(df), CHUNK_ROWS):
+        yield df.iloc[start:start + CHUNK_ROWS]
+
+
+def _write_csv(df, sink):
+    text = io.TextIOWrapper(sink, encoding='utf-8', newline='', write_through=True)
+    try:
+        for idx, chunk in enumerate(_chunks(df)):
+            chunk.to_csv(text, header=(idx == 0))
+        if len(df) == 0:
+            df.to_csv(text)
+        text.flush()
+    finally:
+        # Detach so closing the wrapper doesn't close the underlying sink
+        text.detach()
+
+
+def _arrow_tables(df):
+    import pyarrow as pa
+
+    schema = pa.Schema.from_pandas(df)
+    if len(df) == 0:
+        yield schema, pa.Table.from_pandas(df, schema=schema)
+        return
+    for chunk in _chunks(df):
+        yield schema, pa.Table.from_pandas(chunk, schema=schema)
+
+
+def _write_parquet(df, sink):
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for schema, table in _arrow_tables(df):
+            if writer is None:
+                writer = pq.ParquetWriter(sink, schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _write_arrow(df, sink):
+    import pyarrow as pa
+
+    writer = None
+    try:
+        for schema, table in _arrow_tables(df):
+            if writer is None:
+                writer = pa.ipc.new_file(sink, schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _write_excel(df, sink, sheet_name='data'):
+    with pd.ExcelWriter(sink, engine='openpyxl') as writer:
+        df.to_excel(writer, sheet_name=sheet_name)
+
+
+_WRITERS = {
+    'csv': _write_csv,
+    'parquet': _write_parquet,
+    'arrow': _write_arrow,
+    'excel': _write_excel,
+}
+
+
+def write_dataframe(df, fmt, sink):
+    """
+    Serialize a DataFrame straight into a binary file-like sink
+
+    Rows are written in chunks, so no full in-memory copy of the
+    serialized frame is made on the way.
+    """
+    if fmt not in _WRITERS:
+        raise ValueError(f"Unknown export format: {fmt!r}")
+    _WRITERS[fmt](df, sink)
+
+
+def export_dataframe(df, fmt='csv'):
+    """
+    Serialized bytes of a DataFrame in the requested format
+
+    Payloads are cached by content hash, so repeated downloads of the same
+    data (from any session) are served without re-serializing.
+    """
+    key = ('frame', fmt, dataframe_fingerprint(df))
+
+    def build():
+        buffer = io.BytesIO()
+        write_dataframe(df, fmt, buffer)
+        return buffer.getvalue()
+
+    return _cached(key, build)
+
+
+def export_bundle(frames, fmt='csv'):
+    """
+    Zip archive with one file per DataFrame
+
+    Parameters:
+    - frames: Dict of {name: DataFrame}; None entries are skipped
+    - fmt: Format used for every file in the archive
+
+    Returns: Zip archive bytes. The archive is built in memory (Streamlit
+    needs the whole payload to serve a download) and cached like any other
+    export, within CACHE_MAX_BYTES.
+    """
+    frames = {name: df for name, df in frames.items() if df is not None}
+    key = ('bundle', fmt) + tuple(
+        (name, dataframe_fingerprint(df)) for name, df in sorted(frames.items())
+    )
+
+    def build():
+        # Each member is streamed into the archive, so only the compressed bytes are held
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for name, df in frames.items():
+                with archive.open(file_name(name, fmt), 'w', force_zip64=True) as member:
+                    write_dataframe(df, fmt, member)
+        return buffer.getvalue()
+
+    return _cached(key, build)
+
+
+def cash_flow_frame(projection):
+    """DataFrame from SolarROICalculator.cash_flow_projection output"""
+    return pd.DataFrame(projection).set_index('year')
+
+
+# Test the export helpers
+if __name__ == "__main__":
+    import numpy as np
+
+    print("Testing exports...")
+    dates = pd.date_range('2000-01-01', '2024-12-31', freq='D').strftime('%Y%m%d')
+    df = pd.DataFrame(
+        {'solar_irradiance': np.random.default_rng(0).uniform(1, 8, len(dates))},
+        index=dates
+    )
+    for fmt in EXPORT_FORMATS:
+        payload = export_dataframe(df, fmt)
+        assert export_dataframe(df.copy(), fmt) is payload
+        print(f"✅ {fmt}: {len(payload):,} bytes")
+    bundle = export_bundle({'irradiance': df, 'comparison': None}, 'parquet')
+    print(f"✅ bundle: {len(bundle):,} bytes")
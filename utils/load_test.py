@@ -0,0 +1,447 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT_DIR, 'Home.py')
+RSS_SAMPLE_SECONDS = 0.05
+RERUN_TIMEOUT_SECONDS = 120
+SERVER_START_TIMEOUT_SECONDS = 60
+PERCENTILES = (50, 95, 99)
+PROCESS_MODE_NOTE = (
+    "Each session runs Home.py in its own interpreter, so memory figures describe N single-user "
+    "processes, not one server; use --server for a single server's footprint."
+)
+
+
+def current_rss_bytes(pid='self'):
+    """Resident set size of a process (peak RSS of this process where /proc is unavailable)"""
+    try:
+        with open(f'/proc/{pid}/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        if pid != 'self':
+            return 0
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class RssSampler:
+    """Samples a process's RSS (default this one) in a background thread and keeps the peak"""
+
+    def __init__(self, interval=RSS_SAMPLE_SECONDS, pid='self'):
+        self.interval = interval
+        self.pid = pid
+        self.peak = current_rss_bytes(pid)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='rss-sampler', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss_bytes(self.pid))
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss_bytes(self.pid))
+
+
+def latency_summary(seconds):
+    """Count, mean, max and percentiles of rerun latencies, in milliseconds"""
+    if not seconds:
+        return {'count': 0}
+    ms = np.asarray(seconds) * 1000
+    summary = {'count': len(ms), 'mean_ms': float(ms.mean()), 'max_ms': float(ms.max())}
+    summary.update({f"p{p}_ms": float(np.percentile(ms, p)) for p in PERCENTILES})
+    return summary
+
+
+def _button(at, label):
+    return next(button for button in list(at.sidebar.button) + list(at.button) if label in button.label)
+
+
+def _slider(at, label):
+    return next(slider for slider in at.sidebar.slider if slider.label.startswith(label))
+
+
+def run_session(index, sites, tweaks, think_seconds, barrier=None):
+    """
+    One simulated user: analyze a site, tweak the system size, then compare locations
+
+    Runs in its own process (AppTest sessions can't share one); the barrier
+    starts all sessions together once they are set up.
+
+    Returns: Dictionary with 'timings' as (flow, seconds) pairs, 'errors',
+    and this process's 'baseline_rss_bytes' and 'peak_rss_bytes'
+    """
+    sys.path.insert(0, ROOT_DIR)
+    from streamlit.testing.v1 import AppTest
+
+    timings, errors = [], []
+    step = 'load'
+
+    def rerun(flow, action):
+        nonlocal step
+        step = flow
+        start = time.perf_counter()
+        at = action()
+        timings.append((flow, time.perf_counter() - start))
+        if at.exception:
+            errors.append(f"session {index} {flow}: {at.exception[0].message}")
+        time.sleep(think_seconds)
+        return at
+
+    baseline_rss = current_rss_bytes()
+    if barrier is not None:
+        barrier.wait()
+    with RssSampler() as sampler:
+        try:
+            at = AppTest.from_file(APP_PATH, default_timeout=RERUN_TIMEOUT_SECONDS)
+            at = rerun('load', at.run)
+
+            lat, lon = sites[index % len(sites)]
+            at.sidebar.number_input[0].set_value(lat)
+            at.sidebar.number_input[1].set_value(lon)
+            at = rerun('analyze', _button(at, 'Analyze Investment').click().run)
+
+            for tweak in range(tweaks):
+                at = rerun('tweak', _slider(at, 'System Size').set_value(50 + 50 * ((index + tweak) % 19)).run)
+
+            at = rerun('compare', _button(at, 'Compare Locations').click().run)
+        except Exception as e:
+            errors.append(f"session {index} {step}: {e!r}")
+
+    return {'timings': timings, 'errors': errors, 'baseline_rss_bytes': baseline_rss, 'peak_rss_bytes': sampler.peak}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class ServerSession:
+    """
+    One browser-like client of a running Streamlit server, over its websocket
+
+    Like the frontend, every rerun request carries the state of every widget
+    set so far; a button click adds a one-off trigger. Widget ids are learnt
+    from the elements the server sends back.
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self.widgets = {}  # label -> widget id, from the latest run
+        self.states = {}  # widget id -> WidgetState sent with every rerun
+        self._websocket = None
+
+    async def __aenter__(self):
+        import websockets
+
+        self._websocket = await websockets.connect(self.url, subprotocols=['streamlit'], max_size=None)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._websocket.close()
+
+    def _widget(self, label):
+        return next(widget_id for name, widget_id in self.widgets.items() if label in name)
+
+    def set_number(self, label, value):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        widget_id = self._widget(label)
+        self.states[widget_id] = WidgetState(id=widget_id, double_value=value)
+
+    def set_slider(self, label, value):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        widget_id = self._widget(label)
+        state = WidgetState(id=widget_id)
+        state.double_array_value.data.append(value)
+        self.states[widget_id] = state
+
+    async def rerun(self, click=None):
+        """
+        Run the script once, optionally clicking the button whose label contains `click`
+
+        Returns: List of exception messages the run displayed
+        """
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        message = BackMsg()
+        message.rerun_script.query_string = ''
+        message.rerun_script.widget_states.widgets.extend(self.states.values())
+        if click is not None:
+            message.rerun_script.widget_states.widgets.add(id=self._widget(click), trigger_value=True)
+        await self._websocket.send(message.SerializeToString())
+
+        errors = []
+        while True:
+            reply = ForwardMsg()
+            reply.ParseFromString(await asyncio.wait_for(self._websocket.recv(), RERUN_TIMEOUT_SECONDS))
+            kind = reply.WhichOneof('type')
+            if kind == 'delta' and reply.delta.WhichOneof('type') == 'new_element':
+                element = reply.delta.new_element
+                widget = getattr(element, element.WhichOneof('type'))
+                if element.WhichOneof('type') == 'exception':
+                    errors.append(widget.message)
+                elif 'id' in widget.DESCRIPTOR.fields_by_name and 'label' in widget.DESCRIPTOR.fields_by_name:
+                    self.widgets[widget.label] = widget.id
+            elif kind == 'script_finished':
+                status = reply.script_finished
+                if status == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    errors.append("script failed to compile")
+                if status != ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY:
+                    return errors
+
+
+async def run_server_session(index, url, sites, tweaks, think_seconds):
+    """
+    One simulated user of a real server: the same flow as run_session
+
+    Returns: Dictionary with 'timings' as (flow, seconds) pairs and 'errors'
+    """
+    timings, errors = [], []
+    step = 'load'
+    try:
+        async with ServerSession(url) as session:
+            async def rerun(flow, click=None):
+                nonlocal step
+                step = flow
+                start = time.perf_counter()
+                shown = await session.rerun(click)
+                timings.append((flow, time.perf_counter() - start))
+                errors.extend(f"session {index} {flow}: {message}" for message in shown)
+                await asyncio.sleep(think_seconds)
+
+            await rerun('load')
+
+            lat, lon = sites[index % len(sites)]
+            session.set_number('Latitude', lat)
+            session.set_number('Longitude', lon)
+            await rerun('analyze', 'Analyze Investment')
+
+            for tweak in range(tweaks):
+                session.set_slider('System Size (kW)', 50 + 50 * ((index + tweak) % 19))
+                await rerun('tweak')
+
+            await rerun('compare', 'Compare Locations')
+    except Exception as e:
+        errors.append(f"session {index} {step}: {e!r}")
+    return {'timings': timings, 'errors': errors}
+
+
+def _free_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def _wait_for_server(port, process):
+    deadline = time.monotonic() + SERVER_START_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"streamlit exited with code {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(f"streamlit did not start within {SERVER_START_TIMEOUT_SECONDS} s")
+
+
+def _start_emulator(latency_ms, jitter_ms, error_rate, seed):
+    sys.path.insert(0, ROOT_DIR)
+    from data.power_emulator import PowerEmulator
+
+    return PowerEmulator(
+        port=0, latency_ms=latency_ms, jitter_ms=jitter_ms, error_rate=error_rate, seed=seed
+    ).start()
+
+
+def _sites(distinct_sites, seed):
+    rng = np.random.default_rng(seed)
+    return [(round(float(lat), 2), round(float(lon), 2))
+            for lat, lon in zip(rng.uniform(-50, 50, distinct_sites), rng.uniform(-150, 150, distinct_sites))]
+
+
+def _report(mode, config, wall_seconds, results, memory, upstream):
+    timings = [timing for result in results for timing in result['timings']]
+    flows = sorted({flow for flow, _ in timings})
+    return {
+        'timestamp': int(time.time()),
+        'commit': _git_commit(),
+        'mode': mode,
+        'config': config,
+        'wall_seconds': wall_seconds,
+        'reruns_per_second': len(timings) / wall_seconds if wall_seconds else None,
+        'latency': {
+            'all': latency_summary([seconds for _, seconds in timings]),
+            **{flow: latency_summary([seconds for name, seconds in timings if name == flow]) for flow in flows},
+        },
+        'memory': memory,
+        'upstream': {
+            'requests': upstream.get('requests', 0),
+            'per_session': upstream.get('requests', 0) / config['sessions'],
+            'by_status': {key[len('status_'):]: value for key, value in upstream.items() if key.startswith('status_')},
+            'bytes_sent': upstream.get('bytes_sent', 0),
+        },
+        'errors': [error for result in results for error in result['errors']],
+    }
+
+
+def run_load_test(sessions=8, tweaks=3, distinct_sites=4, think_ms=0, latency_ms=200, jitter_ms=50,
+                  error_rate=0.0, seed=0):
+    """
+    Drive concurrent simulated sessions through Home.py against a local POWER emulator
+
+    Each session runs in its own spawned process: AppTest swaps process-wide
+    Streamlit state on every run, so sessions can't share one. This measures
+    N single-user interpreters, not one server: in-process caches are per
+    session, upstream counts are an upper bound for a single server, and the
+    memory figures are per session process (their sum is not a server's
+    footprint; see run_server_load_test). All sessions use one emulator and
+    a temporary solar cache directory.
+
+    Returns: Dictionary with the configuration, rerun latency percentiles
+    overall and per flow, memory per session process, and upstream request
+    counts
+    """
+    emulator = _start_emulator(latency_ms, jitter_ms, error_rate, seed)
+    # Sessions read both when they import data.solar_data
+    os.environ['POWER_API_URL'] = emulator.url
+    os.environ['SOLAR_CACHE_DIR'] = tempfile.mkdtemp(prefix='solar-load-test-')
+    sites = _sites(distinct_sites, seed)
+
+    context = multiprocessing.get_context('spawn')
+    with context.Manager() as manager:
+        barrier = manager.Barrier(sessions)
+        with ProcessPoolExecutor(max_workers=sessions, mp_context=context) as pool:
+            futures = [
+                pool.submit(run_session, index, sites, tweaks, think_ms / 1000, barrier)
+                for index in range(sessions)
+            ]
+            start = time.perf_counter()
+            results = [future.result() for future in futures]
+            wall_seconds = time.perf_counter() - start
+    upstream = emulator.stats()
+    emulator.stop()
+
+    peaks = [result['peak_rss_bytes'] for result in results]
+    growth = [result['peak_rss_bytes'] - result['baseline_rss_bytes'] for result in results]
+    config = {
+        'sessions': sessions, 'tweaks': tweaks, 'distinct_sites': distinct_sites, 'think_ms': think_ms,
+        'upstream_latency_ms': latency_ms, 'upstream_jitter_ms': jitter_ms,
+        'upstream_error_rate': error_rate, 'seed': seed,
+    }
+    memory = {
+        'note': PROCESS_MODE_NOTE,
+        'session_process_peak_rss_bytes': {'mean': float(np.mean(peaks)), 'max': int(np.max(peaks))},
+        'session_process_rss_growth_bytes': {'mean': float(np.mean(growth)), 'max': int(np.max(growth))},
+        'sum_of_session_process_rss_bytes': int(np.sum(peaks)),
+    }
+    return _report('process', config, wall_seconds, results, memory, upstream)
+
+
+def run_server_load_test(sessions=8, tweaks=3, distinct_sites=4, think_ms=0, latency_ms=200, jitter_ms=50,
+                         error_rate=0.0, seed=0):
+    """
+    Drive concurrent websocket sessions through one `streamlit run Home.py` server
+
+    The server is a real Streamlit process on a free local port, pointed at
+    a local POWER emulator and a temporary solar cache directory. Sessions
+    share its caches, as real users do, and its RSS is sampled throughout.
+
+    Returns: Dictionary shaped like run_load_test, with the server's
+    baseline (idle, before the first session), peak and growth RSS
+    """
+    emulator = _start_emulator(latency_ms, jitter_ms, error_rate, seed)
+    env = dict(os.environ, POWER_API_URL=emulator.url, SOLAR_CACHE_DIR=tempfile.mkdtemp(prefix='solar-load-test-'))
+    sites = _sites(distinct_sites, seed)
+    port = _free_port()
+    url = f"ws://127.0.0.1:{port}/_stcore/stream"
+
+    async def run_all():
+        return await asyncio.gather(*(
+            run_server_session(index, url, sites, tweaks, think_ms / 1000) for index in range(sessions)
+        ))
+
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'streamlit', 'run', APP_PATH, '--server.headless', 'true',
+         '--server.port', str(port), '--browser.gatherUsageStats', 'false'],
+        cwd=ROOT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        _wait_for_server(port, process)
+        baseline_rss = current_rss_bytes(process.pid)
+        with RssSampler(pid=process.pid) as sampler:
+            start = time.perf_counter()
+            results = asyncio.run(run_all())
+            wall_seconds = time.perf_counter() - start
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+        upstream = emulator.stats()
+        emulator.stop()
+
+    config = {
+        'sessions': sessions, 'tweaks': tweaks, 'distinct_sites': distinct_sites, 'think_ms': think_ms,
+        'upstream_latency_ms': latency_ms, 'upstream_jitter_ms': jitter_ms,
+        'upstream_error_rate': error_rate, 'seed': seed,
+    }
+    memory = {
+        'server_baseline_rss_bytes': baseline_rss,
+        'server_peak_rss_bytes': sampler.peak,
+        'server_rss_growth_bytes': sampler.peak - baseline_rss,
+    }
+    return _report('server', config, wall_seconds, results, memory, upstream)
+
+
+# Run the load test
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for Home.py")
+    parser.add_argument('--sessions', type=int, default=8, help="concurrent simulated users")
+    parser.add_argument('--tweaks', type=int, default=3, help="system-size changes per session")
+    parser.add_argument('--distinct-sites', type=int, default=4, help="sites the sessions analyse")
+    parser.add_argument('--think-ms', type=float, default=0, help="pause between a session's actions")
+    parser.add_argument('--latency-ms', type=float, default=200, help="emulated upstream latency")
+    parser.add_argument('--jitter-ms', type=float, default=50, help="emulated upstream latency jitter")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of upstream requests that fail")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--server', action='store_true',
+                        help="drive one real `streamlit run` server over websockets instead of AppTest processes")
+    parser.add_argument('--output', help="append the JSON result as one line to this file")
+    args = parser.parse_args()
+
+    result = (run_server_load_test if args.server else run_load_test)(
+        args.sessions, args.tweaks, args.distinct_sites, args.think_ms,
+        args.latency_ms, args.jitter_ms, args.error_rate, args.seed
+    )
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, 'a', encoding='utf-8') as output:
+            output.write(json.dumps(result) + "\n")
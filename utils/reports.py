@@ -0,0 +1,279 @@
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from models.payback import format_payback
+
+MAX_PENDING_JOBS = 16  # reports queued or rendering before new requests are turned away
+REPORT_CACHE_SIZE = 64  # finished PDFs kept in memory
+
+
+def report_input(latitude, longitude, system_size_kw, electricity_rate, results, solar_df, projection):
+    """
+    Plain, picklable description of everything a report needs
+
+    Parameters:
+    - latitude, longitude: Site coordinates
+    - system_size_kw: System size in kilowatts
+    - electricity_rate: Cost per kWh in USD
+    - results: Output of SolarROICalculator.calculate_roi
+    - solar_df: DataFrame from get_solar_data
+    - projection: Output of SolarROICalculator.cash_flow_projection
+
+    Returns: Dictionary that can be sent to a worker process
+    """
+    return {
+        'latitude': float(latitude),
+        'longitude': float(longitude),
+        'system_size_kw': float(system_size_kw),
+        'electricity_rate': float(electricity_rate),
+        'results': {key: float(value) for key, value in results.items()},
+        'irradiance_dates': [str(date) for date in solar_df.index],
+        'irradiance': solar_df['solar_irradiance'].to_numpy(dtype=float),
+        'projection': {key: [float(value) for value in values] for key, values in projection.items()},
+    }
+
+
+def report_key(inputs):
+    """Cache key for a report: identical inputs always give the same key"""
+    digest = hashlib.blake2b(digest_size=16)
+    scalars = {key: value for key, value in inputs.items() if key != 'irradiance'}
+    digest.update(json.dumps(scalars, sort_keys=True).encode())
+    digest.update(np.ascontiguousarray(inputs['irradiance']).tobytes())
+    return digest.hexdigest()
+
+
+def _draw_summary_page(pdf, inputs):
+    import matplotlib.pyplot as plt
+
+    results = inputs['results']
+    fig = plt.figure(figsize=(8.27, 11.69))  # A4 portrait
+    fig.text(0.08, 0.94, "Solar ROI Report", fontsize=22, weight='bold', color='#1e3a8a')
+    fig.text(0.08, 0.915, "Solar ROI Predictor by NASA Techies", fontsize=10, color='#64748b')
+
+    rows = [
+        ("Location", f"{inputs['latitude']:.4f}, {inputs['longitude']:.4f}"),
+        ("System Size", f"{inputs['system_size_kw']:,.0f} kW"),
+        ("Electricity Rate", f"${inputs['electricity_rate']:.2f}/kWh"),
+        ("Average Solar Irradiance", f"{np.nanmean(inputs['irradiance']):.2f} kWh/m²/day"),
+        ("Annual Production", f"{results['annual_production_kwh']:,.0f} kWh"),
+        ("Total Investment", f"${results['total_investment']:,.0f}"),
+        ("Total Revenue (25 years)", f"${results['total_revenue_25y']:,.0f}"),
+        ("Net Profit (25 years)", f"${results['net_profit']:,.0f}"),
+        ("ROI (25 years)", f"{results['roi_percent']:.1f}%"),
+        ("Payback Period", format_payback(results['payback_period_years'])),
+        ("Discounted Payback", format_payback(results['discounted_payback_years'])),
+    ]
+    table_ax = fig.add_axes([0.08, 0.52, 0.84, 0.36])
+    table_ax.axis('off')
+    table = table_ax.table(cellText=rows, colWidths=[0.5, 0.5], loc='upper center', cellLoc='left')
+    table.scale(1, 1.8)
+    for (row, col), cell in table.get_celld().items():
+        cell.set_edgecolor('#cbd5e1')
+        if col == 0:
+            cell.set_text_props(weight='bold')
+
+    # Map snapshot: world locator plus a close-up of the proposed site
+    lat, lon = inputs['latitude'], inputs['longitude']
+    world_ax = fig.add_axes([0.08, 0.12, 0.5, 0.3])
+    world_ax.set_xlim(-180, 180)
+    world_ax.set_ylim(-90, 90)
+    world_ax.set_facecolor('#e0f2fe')
+    world_ax.grid(color='white', linewidth=0.8)
+    world_ax.plot(lon, lat, marker='*', markersize=16, color='orange', markeredgecolor='#b45309')
+    world_ax.set_title("Site Location", fontsize=10)
+    world_ax.set_xlabel("Longitude")
+    world_ax.set_ylabel("Latitude")
+
+    detail_ax = fig.add_axes([0.66, 0.12, 0.26, 0.3])
+    radius_deg = 500 / 111_320  # 500 m farm area, as drawn on the app map
+    detail_ax.add_patch(plt.Circle((lon, lat), radius_deg, color='orange', alpha=0.25))
+    detail_ax.plot(lon, lat, marker='o', color='orange', markeredgecolor='#b45309')
+    detail_ax.set_xlim(lon - 4 * radius_deg, lon + 4 * radius_deg)
+    detail_ax.set_ylim(lat - 4 * radius_deg, lat + 4 * radius_deg)
+    detail_ax.set_aspect('equal')
+    detail_ax.set_xticks([])
+    detail_ax.set_yticks([])
+    detail_ax.set_title("Proposed Solar Farm Area", fontsize=10)
+
+    pdf.savefig(fig)
+    plt.close(fig)
+
+
+def _draw_charts_page(pdf, inputs):
+    import matplotlib.pyplot as plt
+
+    fig, (irr_ax, cash_ax) = plt.subplots(2, 1, figsize=(8.27, 11.69))
+
+    irradiance = inputs['irradiance']
+    irr_ax.plot(np.arange(len(irradiance)), irradiance, color='#3b82f6', linewidth=1)
+    irr_ax.set_title("Daily Solar Irradiance")
+    irr_ax.set_xlabel("Day")
+    irr_ax.set_ylabel("kWh/m²/day")
+    if inputs['irradiance_dates']:
+        ticks = np.linspace(0, len(irradiance) - 1, min(6, len(irradiance))).astype(int)
+        irr_ax.set_xticks(ticks)
+        irr_ax.set_xticklabels([inputs['irradiance_dates'][tick] for tick in ticks])
+
+    years = inputs['projection']['year']
+    cumulative = inputs['projection']['cumulative_cash_flow']
+    cash_ax.plot(years, cumulative, color='#10b981', linewidth=2.5)
+    cash_ax.fill_between(years, cumulative, 0, color='#10b981', alpha=0.2)
+    cash_ax.axhline(0, color='red', linestyle='--', label='Break Even Point')
+    cash_ax.set_title("25-Year Cash Flow Projection")
+    cash_ax.set_xlabel("Year")
+    cash_ax.set_ylabel("Cumulative Cash Flow ($)")
+    cash_ax.legend(loc='upper left')
+
+    fig.tight_layout(pad=3)
+    pdf.savefig(fig)
+    plt.close(fig)
+
+
+def render_report(inputs):
+    """
+    Render a report to PDF bytes
+
+    Runs inside a worker process, so it only depends on the plain inputs
+    produced by report_input.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    buffer = io.BytesIO()
+    with PdfPages(buffer) as pdf:
+        _draw_summary_page(pdf, inputs)
+        _draw_charts_page(pdf, inputs)
+    return buffer.getvalue()
+
+
+class ReportService:
+    """
+    Renders PDF reports in a background process pool
+
+    Jobs are keyed on their inputs: submitting the same inputs again returns
+    the same job, and finished reports are served from an in-memory cache.
+    """
+
+    def __init__(self, max_workers=None, max_pending=MAX_PENDING_JOBS, cache_size=REPORT_CACHE_SIZE):
+        # Leave half the cores for interactive reruns
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) // 2)
+        self.max_pending = max_pending
+        self.cache_size = cache_size
+        self._executor = None
+        self._jobs = {}
+        self._reports = OrderedDict()
+        self._failed = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            # spawn: forking a threaded server process is not safe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
+
+    def _mark_failed(self, job_id):
+        # Called with the lock held; bounded like the report cache
+        self._failed[job_id] = True
+        while len(self._failed) > self.cache_size:
+            self._failed.popitem(last=False)
+
+    def _on_done(self, job_id, future):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+            if future.cancelled():
+                self._mark_failed(job_id)
+                return
+            error = future.exception()
+            if error is not None:
+                print(f"Error generating report: {error}")
+                self._mark_failed(job_id)
+                return
+            self._reports[job_id] = future.result()
+            while len(self._reports) > self.cache_size:
+                self._reports.popitem(last=False)
+
+    def submit(self, inputs):
+        """
+        Queue a report for rendering
+
+        Returns: Job id, or None when the queue is full
+        """
+        job_id = report_key(inputs)
+        with self._lock:
+            if job_id in self._reports:
+                self._reports.move_to_end(job_id)
+                return job_id
+            if job_id in self._jobs:
+                return job_id
+            if len(self._jobs) >= self.max_pending:
+                return None
+            self._failed.pop(job_id, None)
+            future = self._get_executor().submit(render_report, inputs)
+            self._jobs[job_id] = future
+        future.add_done_callback(lambda done, job_id=job_id: self._on_done(job_id, done))
+        return job_id
+
+    def status(self, job_id):
+        """One of 'done', 'running', 'queued', 'failed' or 'unknown'"""
+        with self._lock:
+            if job_id in self._reports:
+                return 'done'
+            if job_id in self._failed:
+                return 'failed'
+            future = self._jobs.get(job_id)
+        if future is None:
+            return 'unknown'
+        if future.done():
+            # The done callback is about to move it into the cache
+            return 'running'
+        return 'running' if future.running() else 'queued'
+
+    def result(self, job_id):
+        """PDF bytes of a finished report, or None"""
+        with self._lock:
+            return self._reports.get(job_id)
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Test the report service
+if __name__ == "__main__":
+    import time
+    import pandas as pd
+    from models.roi_calculator import SolarROICalculator
+
+    print("Testing report generation...")
+    dates = pd.date_range('2024-01-01', '2024-12-31').strftime('%Y%m%d')
+    solar_df = pd.DataFrame({'solar_irradiance': np.random.default_rng(0).uniform(3, 8, len(dates))}, index=dates)
+    calc = SolarROICalculator()
+    results = calc.calculate_roi(solar_df['solar_irradiance'].mean(), 100, 0.12)
+    projection = calc.cash_flow_projection(results['annual_production_kwh'], results['total_investment'], 0.12)
+    inputs = report_input(33.45, -112.07, 100, 0.12, results, solar_df, projection)
+
+    service = ReportService()
+    start = time.perf_counter()
+    job_id = service.submit(inputs)
+    while service.status(job_id) in ('queued', 'running'):
+        time.sleep(0.05)
+    print(f"✅ Report {service.status(job_id)} in {time.perf_counter() - start:.2f}s, "
+          f"{len(service.result(job_id) or b''):,} bytes")
+    start = time.perf_counter()
+    assert service.submit(inputs) == job_id and service.status(job_id) == 'done'
+    print(f"✅ Repeat request served from cache in {(time.perf_counter() - start) * 1000:.2f} ms")
+    service.shutdown()
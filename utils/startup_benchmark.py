@@ -0,0 +1,122 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOME_PATH = os.path.join(ROOT_DIR, 'Home.py')
+ABOUT_PATH = os.path.join(ROOT_DIR, 'pages', 'About.py')
+APP_MODULES = (
+    'data.presets', 'data.tmy', 'models.roi_calculator', 'models.payback', 'models.equipment',
+    'models.tariff', 'models.comparison', 'utils.export', 'utils.reports', 'utils.cache_warmer',
+    'utils.assets',
+)
+RERUN_TIMEOUT_SECONDS = 60
+
+
+def _elapsed_ms(action):
+    start = time.perf_counter()
+    result = action()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def measure_in_process():
+    """
+    Startup timings for one fresh interpreter, in milliseconds
+
+    - app_imports: importing the app's own modules once Streamlit is loaded
+    - home_cold / about_cold: first run of each page in a new session
+    - home_rerun / about_rerun: the next run of the same page
+    - switch_to_about / switch_to_home: moving between pages in one session
+    """
+    sys.path.insert(0, ROOT_DIR)
+    from streamlit.testing.v1 import AppTest
+    import importlib
+
+    timings = {}
+    timings['app_imports'], _ = _elapsed_ms(lambda: [importlib.import_module(name) for name in APP_MODULES])
+
+    home = AppTest.from_file(HOME_PATH, default_timeout=RERUN_TIMEOUT_SECONDS)
+    timings['home_cold'], _ = _elapsed_ms(home.run)
+    timings['home_rerun'], _ = _elapsed_ms(home.run)
+    timings['switch_to_about'], _ = _elapsed_ms(lambda: home.switch_page('pages/About.py').run())
+    timings['switch_to_home'], _ = _elapsed_ms(lambda: home.switch_page('Home.py').run())
+
+    about = AppTest.from_file(ABOUT_PATH, default_timeout=RERUN_TIMEOUT_SECONDS)
+    timings['about_cold'], _ = _elapsed_ms(about.run)
+    timings['about_rerun'], _ = _elapsed_ms(about.run)
+
+    errors = [element.message for app in (home, about) for element in app.exception]
+    return {'timings_ms': timings, 'errors': errors}
+
+
+def run_benchmark(repeats=5):
+    """
+    Cold-start benchmark: measure_in_process in `repeats` fresh interpreters
+
+    Upstream requests go to a local POWER emulator and caches to a temporary
+    directory, so results don't depend on the network or earlier runs.
+
+    Returns: Dictionary with the median, min and max of every timing, plus
+    the total wall time of each interpreter (import to exit)
+    """
+    sys.path.insert(0, ROOT_DIR)
+    from data.power_emulator import PowerEmulator
+
+    emulator = PowerEmulator(port=0).start()
+    env = dict(os.environ, POWER_API_URL=emulator.url, SOLAR_CACHE_DIR=tempfile.mkdtemp(prefix='solar-startup-'))
+
+    runs, errors = [], []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        process = subprocess.run(
+            [sys.executable, '-m', 'utils.startup_benchmark', '--child'],
+            cwd=ROOT_DIR, env=env, capture_output=True, text=True
+        )
+        wall_ms = (time.perf_counter() - start) * 1000
+        if process.returncode != 0:
+            errors.append(process.stderr.strip().splitlines()[-1] if process.stderr.strip() else "child failed")
+            continue
+        result = json.loads(process.stdout.strip().splitlines()[-1])
+        runs.append({**result['timings_ms'], 'process_wall': wall_ms})
+        errors += result['errors']
+    emulator.stop()
+
+    timings = {}
+    for name in (runs[0] if runs else {}):
+        values = np.array([run[name] for run in runs])
+        timings[name] = {
+            'median_ms': float(np.median(values)), 'min_ms': float(values.min()), 'max_ms': float(values.max())
+        }
+
+    commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, capture_output=True, text=True)
+    return {
+        'timestamp': int(time.time()),
+        'commit': commit.stdout.strip() or None,
+        'repeats': repeats,
+        'timings': timings,
+        'errors': errors,
+    }
+
+
+# Run the startup benchmark
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold-start and page-switch benchmark")
+    parser.add_argument('--repeats', type=int, default=5, help="fresh interpreters to measure")
+    parser.add_argument('--output', help="append the JSON result as one line to this file")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_in_process()))
+    else:
+        result = run_benchmark(args.repeats)
+        print(json.dumps(result, indent=2))
+        if args.output:
+            with open(args.output, 'a', encoding='utf-8') as output:
+                output.write(json.dumps(result) + "\n")
@@ -0,0 +1,38 @@
+def cash_flow_figure(projection):
+    """
+    Cumulative cash flow chart with the break-even line
+
+    Parameters:
+    - projection: Output of SolarROICalculator.cash_flow_projection
+
+    Returns: Plotly Figure
+    """
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+
+    fig.add_trace(go.Scatter(
+        x=projection['year'],
+        y=projection['cumulative_cash_flow'],
+        fill='tozeroy',
+        name='Cumulative Cash Flow',
+        line=dict(color='#10b981', width=3),
+        fillcolor='rgba(16, 185, 129, 0.2)'
+    ))
+
+    fig.add_hline(
+        y=0,
+        line_dash="dash",
+        line_color="red",
+        annotation_text="Break Even Point",
+        annotation_position="right"
+    )
+
+    fig.update_layout(
+        xaxis_title="Year",
+        yaxis_title="Cumulative Cash Flow ($)",
+        hovermode='x unified',
+        height=400
+    )
+
+    return fig